@@ -1,74 +1,33 @@
 import ppdv
 from dash import  dcc, Dash, html
 import plotly.graph_objs as go
-import requests
-import redis
 import threading
-import time
 from flask import Flask
-import json
-from datetime import datetime
 from dash import dash_table
-import pytz
 import dash_bootstrap_components as dbc
 import callbacks.callbacks as callbacks
+from callbacks.charts import CHART_TRACES, CHART_WINDOWS, EPISODE_STYLE, LIVE_CHART_WINDOW, MAX_POINTS
+from callbacks.export import register_export_route
+from callbacks.push import register_stream_route, SampleBroadcaster
+from callbacks.result_cache import ResultCache
+from callbacks.ward import register_ward_callbacks, ward_layout
+import config
+from ingest.service import (
+    create_history_store, create_ingest_engine, create_leader_lock, create_redis_client, create_sample_store
+)
+from instrumentation.hooks import register_metrics_route
+from instrumentation.profiler import SlowCallbackProfiler
+from storage.cache import SampleCache
+from storage.codec import SENSOR_NAMES
+from storage.persons import PersonDirectory
 
 
 FA = "https://use.fontawesome.com/releases/v5.15.1/css/all.css"
 external_stylesheets = [FA]
 
-server = Flask(__name__)
-app = Dash(__name__, server=server, external_stylesheets=external_stylesheets)
-
-redis_client = redis.StrictRedis(host='localhost', port=6379, db=0, decode_responses=True)
-
-def fetch_and_store_data():
-    while True:
-        for person_id in range(1, 7):  # IDs from 1 to 6
-            try:
-                response = requests.get(f'http://tesla.iem.pw.edu.pl:9080/v2/monitor/{person_id}')
-                if response.status_code == 200:
-                    data = response.json()
-
-                    utc_time = datetime.utcnow()
-                    warsaw_timezone = pytz.timezone('Europe/Warsaw')
-                    warsaw_time = utc_time.replace(tzinfo=pytz.utc).astimezone(warsaw_timezone)
-                    timestamp = warsaw_time.strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    data_with_timestamp = {'timestamp': timestamp, 'data': data}
-                    # Store data in Redis
-                    redis_client.rpush(f'person_{person_id}_data_list', json.dumps(data_with_timestamp))
-                    redis_client.ltrim(f'person_{person_id}_data_list', -610, -1)
-
-                    if any(sensor.get('anomaly', False) for sensor in data['trace']['sensors']):
-                        anomalies_key = f'person_{person_id}_anomalies'
-                        redis_client.rpush(anomalies_key, json.dumps(data_with_timestamp))
-
-            except requests.RequestException as e:
-                print(f"Error fetching data for person {person_id}: {e}")
-        time.sleep(1)
-
-data_fetch_thread = threading.Thread(target=fetch_and_store_data, daemon=True)
-data_fetch_thread.start()
-
 sensor_columns = ['L0', 'L1', 'L2', 'R0', 'R1', 'R2']
 max_sensor_value = 1100
-conditional_styles = []
-is_sensor_refreshing_paused = False
-is_anomalies_refreshing_paused = False
-
-
-def get_person_options():
-    person_options = []
-    for i in range(1, 8):  # Assuming you have person IDs from 1 to 7
-        response = requests.get(f'http://tesla.iem.pw.edu.pl:9080/v2/monitor/{i}')
-        if response.status_code == 200:
-            person_data = response.json()
-            # Construct label from the firstname and lastname
-            person_label = f"{person_data['firstname']} {person_data['lastname']}"
-            # Use the ID as the value for the dropdown
-            person_options.append({'label': person_label, 'value': i})
-    return person_options
+
 
 def get_color_for_value(value, max_value=1100):
     value = min(max(value, 0), max_value)
@@ -76,184 +35,319 @@ def get_color_for_value(value, max_value=1100):
     hue = (1 - ratio) * 120
     return f"hsl({hue}, 100%, 50%)"
 
-sensor_value_colors = {
-    value: get_color_for_value(value, max_sensor_value) for value in range(max_sensor_value + 1)
-}
-
-for column in sensor_columns:
-    for value, color in sensor_value_colors.items():
-        conditional_styles.append({
-            'if': {
-                'column_id': column,
-                'filter_query': f'{{{column}}} eq {value}'
-            },
-            'backgroundColor': color,
-            'color': 'white' if color != 'hsl(120, 100%, 50%)' else 'black'
-        })
-
-
-callbacks.register_callbacks(app, redis_client)
-
-app.layout = html.Div([
-    # Header
-    html.Div([
-        html.H1('Feet Pressure Sensor Dashboard', style={'textAlign': 'center', 'color': '#000000', 'fontSize': '2.5em', 'margin':'0', 'padding-top':'20px', 'padding-bottom':'20px'}),
-    ], style={'width': '100%', 'display': 'block'}),
-    
-    # Content
-    html.Div([
-        # Person selector and details
-        html.Div([
-            html.H3('Patient', style={'textAlign': 'center', 'marginBottom': '10px'}),
-            # Dropdown with user icon
-            html.Div([
-                html.I(className="fas fa-user", style={'marginRight': '10px'}),
-                 dcc.Dropdown(id='person-selector', options=get_person_options(), style={'width': 'calc(100%)'})
-            ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '20px'}),
-            
-            # Person details
-            html.Div(id='person-details', style={ 'borderRadius': '5px'})
-        ], style={
-            'padding': '20px',
-            'margin': '10px',
-            'border': '1px solid #e9ecef',
-            'borderRadius': '5px',
-            'backgroundColor': '#fff', 
-            'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)', 
-            'width':'350px',
-            'flex': 'none'}), # Set width to 350px and flex to none
-
-        # Sensor chart
-        html.Div([
-            html.H3('Last 2 minutes sensor data chart', style={'textAlign': 'center', 'marginBottom': '10px'}),
-            dcc.Graph(id='sensor-chart')
-        ], style={
-            'padding': '20px',
-            'margin': '10px',
-            'border': '1px solid #e9ecef',
-            'borderRadius': '5px',
-            'backgroundColor': '#fff',
-            'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
-            'flex': '1' # Adjust the flex value as needed
-        }),
-    ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'stretch'}),
-
-    html.Div([
-        # Live pressure Points
+def get_color_styles(columns, max_value=1100, buckets=32):
+    # One range rule per hue band and column instead of one equality rule per
+    # possible value; 32 bands are indistinguishable from the full 1101-step
+    # gradient but keep the table at ~200 rules. buckets=0 restores the exact
+    # per-value rules. The last band is open-ended so readings above
+    # max_value stay red, as they do on the feet view.
+    styles = []
+    if buckets:
+        width = -(-(max_value + 1) // buckets)
+        bands = [(low, low + width) for low in range(0, max_value + 1, width)]
+    else:
+        bands = [(value, value + 1) for value in range(max_value + 1)]
+
+    for column in columns:
+        for i, (low, high) in enumerate(bands):
+            if i == len(bands) - 1:
+                filter_query = f'{{{column}}} >= {low}'
+            else:
+                filter_query = f'{{{column}}} >= {low} && {{{column}}} < {high}'
+            styles.append({
+                'if': {
+                    'column_id': column,
+                    'filter_query': filter_query
+                },
+                'backgroundColor': get_color_for_value((low + high - 1) / 2 if buckets else low, max_value),
+                'color': 'white' if low > 0 else 'black'
+            })
+    return styles
+
+conditional_styles = get_color_styles(sensor_columns, max_sensor_value, config.TABLE_COLOR_BUCKETS)
+
+
+def serve_layout(person_directory, live_config):
+    # Built per page load from the cached person directory, so importing the
+    # app never waits on the monitor API.
+    return html.Div([
+        # Header
         html.Div([
-            html.H3('Live pressure points', style={'textAlign': 'center'}),
-            ppdv.Ppdv(id='feet-pressure', sensorData=[])
-        ], style={
-            'padding': '20px', 
-            'margin': '10px',
-            'border': '1px solid #e9ecef', 
-            'borderRadius': '5px', 
-            'backgroundColor': '#fff', 
-            'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
-            'width': '350px', # Set width to 350px
-            'flex': 'none'}), # Set flex to none
+            html.H1('Feet Pressure Sensor Dashboard', style={'textAlign': 'center', 'color': '#000000', 'fontSize': '2.5em', 'margin':'0', 'padding-top':'20px', 'padding-bottom':'20px'}),
+            html.Div(html.A('Ward overview', href='/ward/'), style={'textAlign': 'center'}),
+        ], style={'width': '100%', 'display': 'block'}),
+        
+        # Content
         html.Div([
-            html.H3('All latest data (lastest 600 records)', style={'textAlign': 'center', 'margin-bottom':'10px', 'margin-top':'5px'}),
-            dash_table.DataTable(
-                id='sensors-table',
-                columns=[
-                    {'name': 'Timestamp', 'id': 'timestamp'},
-                    {'name': 'L0', 'id': 'L0'},
-                    {'name': 'L1', 'id': 'L1'},
-                    {'name': 'L2', 'id': 'L2'},
-                    {'name': 'R0', 'id': 'R0'},
-                    {'name': 'R1', 'id': 'R1'},
-                    {'name': 'R2', 'id': 'R2'},
-                ],
-                style_cell={
-                    'textAlign': 'center',
-                    'overflow': 'hidden',
-                    'textOverflow': 'ellipsis',
-                    'whiteSpace': 'normal'
-                },
-                style_cell_conditional=[
-                    {'if': {'column_id': c},
-                    'minWidth': '50px', 'width': '50px', 'maxWidth': '50px'}
-                    for c in ['L0', 'L1', 'L2', 'R0', 'R1', 'R2']
-                ],
-                style_header={
-                    'backgroundColor': '#e6f3d7',
-                    'fontWeight': 'bold'
-                },
-                style_data_conditional=conditional_styles,
-                export_format="csv",
-                export_headers="display",
-                page_size=15,  # Number of rows visible per page
-            ),
-            html.Div(style={'flex-grow': '1'}),
-            dbc.Row([
-                dbc.Col(html.Button(id='pause-sensor-button', n_clicks=0, children=[html.I(className="fas fa-pause")]), width=2, align='start'),
-            ], style={'display':'flex', 'justify-content':'space-between'}),
-        ], style={
-            'padding': '20px',
-            'margin': '10px',
-            'border': '1px solid #e9ecef',
-            'borderRadius': '5px',
-            'backgroundColor': '#fff',
-            'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
-            'flex': '1.5',
-            'display': 'flex', 
-            'flex-direction': 'column'
-        }),
-       
+            # Person selector and details
+            html.Div([
+                html.H3('Patient', style={'textAlign': 'center', 'marginBottom': '10px'}),
+                # Dropdown with user icon
+                html.Div([
+                    html.I(className="fas fa-user", style={'marginRight': '10px'}),
+                     dcc.Dropdown(id='person-selector', options=person_directory.options(), style={'width': 'calc(100%)'})
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '20px'}),
+                
+                # Person details
+                html.Div(id='person-details', style={ 'borderRadius': '5px'}),
+                # Re-reads the details while they are still being fetched
+                dcc.Interval(id='person-details-retry', interval=1000, disabled=True)
+            ], style={
+                'padding': '20px',
+                'margin': '10px',
+                'border': '1px solid #e9ecef',
+                'borderRadius': '5px',
+                'backgroundColor': '#fff', 
+                'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)', 
+                'width':'350px',
+                'flex': 'none'}), # Set width to 350px and flex to none
+
+            # Sensor chart
+            html.Div([
+                html.H3('Sensor data chart', style={'textAlign': 'center', 'marginBottom': '10px'}),
+                dcc.RadioItems(
+                    id='chart-window',
+                    options=[{'label': label, 'value': window} for window, (label, _) in CHART_WINDOWS.items()],
+                    value=LIVE_CHART_WINDOW,
+                    inline=True,
+                    style={'textAlign': 'center'},
+                    labelStyle={'marginRight': '15px'}
+                ),
+                dcc.Graph(id='sensor-chart'),
+                # Epoch ms of the newest sample (or rollup bucket) already drawn on the chart
+                dcc.Store(id='sensor-chart-cursor'),
+                dcc.Store(id='chart-episodes')
+            ], style={
+                'padding': '20px',
+                'margin': '10px',
+                'border': '1px solid #e9ecef',
+                'borderRadius': '5px',
+                'backgroundColor': '#fff',
+                'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
+                'flex': '1' # Adjust the flex value as needed
+            }),
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'stretch'}),
+
         html.Div([
-            html.H3('Detected anomalies', style={'textAlign': 'center', 'margin-bottom':'10px', 'margin-top':'5px'}),
-            dash_table.DataTable(
-                id='anomalies-table',
-                columns=[
-                    {'name': 'Timestamp', 'id': 'timestamp'},
-                    {'name': 'L0', 'id': 'L0'},
-                    {'name': 'L1', 'id': 'L1'},
-                    {'name': 'L2', 'id': 'L2'},
-                    {'name': 'R0', 'id': 'R0'},
-                    {'name': 'R1', 'id': 'R1'},
-                    {'name': 'R2', 'id': 'R2'},
-                ],
-                style_cell={
-                    'textAlign': 'center',
-                    'overflow': 'hidden',
-                    'textOverflow': 'ellipsis',
-                    'whiteSpace': 'normal'
-                },
-                style_cell_conditional=[
-                    {'if': {'column_id': c},
-                    'minWidth': '50px', 'width': '50px', 'maxWidth': '50px'}
-                    for c in ['L0', 'L1', 'L2', 'R0', 'R1', 'R2']
-                ],
-                style_header={
-                    'backgroundColor': '#e6f3d7',
-                    'fontWeight': 'bold'
-                },
-                style_data_conditional=conditional_styles,
-                export_format="csv",
-                export_headers="display",
-                page_size=15,  # Number of rows visible per page
-            ),
-            html.Div(style={'flex-grow': '1'}),
-            dbc.Row([
-                dbc.Col(html.Button(id='pause-anomalies-button', n_clicks=0, children=[html.I(className="fas fa-pause")]), width=2, align='start'),
-            ], style={'display':'flex', 'justify-content':'space-between'}),
-        ], style={
-            'padding': '20px',
-            'margin': '10px',
-            'border': '1px solid #e9ecef',
-            'borderRadius': '5px',
-            'backgroundColor': '#fff',
-            'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
-            'flex': '1.5',
-            'display': 'flex', 
-            'flex-direction': 'column'
-        }),
-    ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'stretch', 'min-height':'620px'}),
-    # Interval component for periodic callbacks
-    dcc.Interval(id='interval-update', interval=1000, n_intervals=0)
-])
+            # Live pressure Points
+            html.Div([
+                html.H3('Live pressure points', style={'textAlign': 'center'}),
+                ppdv.Ppdv(id='feet-pressure', sensorData=[])
+            ], style={
+                'padding': '20px', 
+                'margin': '10px',
+                'border': '1px solid #e9ecef', 
+                'borderRadius': '5px', 
+                'backgroundColor': '#fff', 
+                'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
+                'width': '350px', # Set width to 350px
+                'flex': 'none'}), # Set flex to none
+            html.Div([
+                html.H3('All latest data (lastest 600 records)', style={'textAlign': 'center', 'margin-bottom':'10px', 'margin-top':'5px'}),
+                dash_table.DataTable(
+                    id='sensors-table',
+                    columns=[
+                        {'name': 'Timestamp', 'id': 'timestamp'},
+                        {'name': 'L0', 'id': 'L0'},
+                        {'name': 'L1', 'id': 'L1'},
+                        {'name': 'L2', 'id': 'L2'},
+                        {'name': 'R0', 'id': 'R0'},
+                        {'name': 'R1', 'id': 'R1'},
+                        {'name': 'R2', 'id': 'R2'},
+                    ],
+                    style_cell={
+                        'textAlign': 'center',
+                        'overflow': 'hidden',
+                        'textOverflow': 'ellipsis',
+                        'whiteSpace': 'normal'
+                    },
+                    style_cell_conditional=[
+                        {'if': {'column_id': c},
+                        'minWidth': '50px', 'width': '50px', 'maxWidth': '50px'}
+                        for c in ['L0', 'L1', 'L2', 'R0', 'R1', 'R2']
+                    ],
+                    style_header={
+                        'backgroundColor': '#e6f3d7',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=conditional_styles,
+                    # Paging and sorting happen server-side; only the visible page is sent
+                    page_action='custom',
+                    page_current=0,
+                    page_size=15,  # Number of rows visible per page
+                    sort_action='custom',
+                    sort_mode='single',
+                    sort_by=[],
+                ),
+                html.Div(style={'flex-grow': '1'}),
+                dbc.Row([
+                    dbc.Col(html.Button(id='pause-sensor-button', n_clicks=0, children=[html.I(id='pause-sensor-icon', className="fas fa-pause")]), width=2, align='start'),
+                    # Full history for the selected person, streamed by /export
+                    dbc.Col(html.A([html.I(className="fas fa-download", style={'marginRight': '5px'}), 'Export CSV'], id='sensors-export', href=''), width='auto', align='end'),
+                ], style={'display':'flex', 'justify-content':'space-between'}),
+            ], style={
+                'padding': '20px',
+                'margin': '10px',
+                'border': '1px solid #e9ecef',
+                'borderRadius': '5px',
+                'backgroundColor': '#fff',
+                'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
+                'flex': '1.5',
+                'display': 'flex', 
+                'flex-direction': 'column'
+            }),
+           
+            html.Div([
+                html.H3('Detected anomalies', style={'textAlign': 'center', 'margin-bottom':'10px', 'margin-top':'5px'}),
+                dash_table.DataTable(
+                    id='anomalies-table',
+                    columns=[
+                        {'name': 'Timestamp', 'id': 'timestamp'},
+                        {'name': 'L0', 'id': 'L0'},
+                        {'name': 'L1', 'id': 'L1'},
+                        {'name': 'L2', 'id': 'L2'},
+                        {'name': 'R0', 'id': 'R0'},
+                        {'name': 'R1', 'id': 'R1'},
+                        {'name': 'R2', 'id': 'R2'},
+                    ],
+                    style_cell={
+                        'textAlign': 'center',
+                        'overflow': 'hidden',
+                        'textOverflow': 'ellipsis',
+                        'whiteSpace': 'normal'
+                    },
+                    style_cell_conditional=[
+                        {'if': {'column_id': c},
+                        'minWidth': '50px', 'width': '50px', 'maxWidth': '50px'}
+                        for c in ['L0', 'L1', 'L2', 'R0', 'R1', 'R2']
+                    ],
+                    style_header={
+                        'backgroundColor': '#e6f3d7',
+                        'fontWeight': 'bold'
+                    },
+                    style_data_conditional=conditional_styles,
+                    # Paging and sorting happen server-side; only the visible page is sent
+                    page_action='custom',
+                    page_current=0,
+                    page_size=15,  # Number of rows visible per page
+                    sort_action='custom',
+                    sort_mode='single',
+                    sort_by=[],
+                ),
+                html.Div(style={'flex-grow': '1'}),
+                dbc.Row([
+                    dbc.Col(html.Button(id='pause-anomalies-button', n_clicks=0, children=[html.I(id='pause-anomalies-icon', className="fas fa-pause")]), width=2, align='start'),
+                    dbc.Col(html.A([html.I(className="fas fa-download", style={'marginRight': '5px'}), 'Export CSV'], id='anomalies-export', href=''), width='auto', align='end'),
+                ], style={'display':'flex', 'justify-content':'space-between'}),
+            ], style={
+                'padding': '20px',
+                'margin': '10px',
+                'border': '1px solid #e9ecef',
+                'borderRadius': '5px',
+                'backgroundColor': '#fff',
+                'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
+                'flex': '1.5',
+                'display': 'flex', 
+                'flex-direction': 'column'
+            }),
+        ], style={'display': 'flex', 'justifyContent': 'center', 'alignItems': 'stretch', 'min-height':'620px'}),
+        # Interval component for periodic callbacks
+        dcc.Interval(id='interval-update', interval=1000, n_intervals=0),
+        # Set by live.tick when this tab needs the server this tick
+        dcc.Store(id='tick-request'),
+        # Ingest version counters this client last rendered
+        dcc.Store(id='tick-versions'),
+        # Which tables are paused, per browser tab
+        dcc.Store(id='pause-state', storage_type='session', data={'sensors': False, 'anomalies': False}),
+        dcc.Store(id='latest-sample'),
+        dcc.Store(id='live-config', data=live_config),
+        dcc.Store(id='live-stream')
+    ])
+
+
+def create_app(ingest=None):
+    """Builds the dashboard; nothing connects or starts polling until this is called.
+
+    With ``ingest`` (default ``config.INGEST_IN_WEB``) the process also runs
+    the monitor fetcher, guarded by a Redis leader lock so that only one of
+    several workers polls. Without it the app only reads what a separate
+    ``python -m ingest`` writes, and any number of workers can serve it:
+
+        PPDV_INGEST_IN_WEB=0 gunicorn -w 4 -k gevent 'app:create_server()'
+    """
+    if ingest is None:
+        ingest = config.INGEST_IN_WEB
+
+    server = Flask(__name__)
+    app = Dash(__name__, server=server, external_stylesheets=external_stylesheets)
+
+    redis_client = create_redis_client()
+    sample_store = create_sample_store(redis_client)
+    history_store = create_history_store()
+
+    sample_cache = SampleCache(
+        sample_store,
+        capacity=config.SAMPLE_CACHE_CAPACITY,
+        anomaly_capacity=config.ANOMALY_CACHE_CAPACITY,
+    )
+    sample_cache.start()
+
+    sample_broadcaster = SampleBroadcaster()
+    sample_cache.add_listener(sample_broadcaster.publish)
+    register_stream_route(server, sample_broadcaster)
+    register_export_route(server, sample_store, history_store, config.PERSON_IDS)
+
+    live_config = {
+        'push': config.LIVE_UPDATES == 'push',
+        'url': '/stream',
+        'sensors': list(SENSOR_NAMES),
+        'traces': CHART_TRACES,
+        'maxPoints': MAX_POINTS,
+        'episodeStyle': EPISODE_STYLE,
+        'liveWindow': LIVE_CHART_WINDOW,
+    }
+
+    result_cache = ResultCache(
+        max_entries=config.RESULT_CACHE_SIZE,
+        redis_client=redis_client if config.RESULT_CACHE_BACKEND == 'redis' else None,
+    )
+
+    person_directory = PersonDirectory(
+        sample_store,
+        config.PERSON_IDS,
+        config.MONITOR_BASE_URL,
+        ttl=config.PERSON_CACHE_TTL,
+    )
+
+    ingest_engine = None
+    if ingest:
+        ingest_engine = create_ingest_engine(sample_store, history_store)
+        leader = create_leader_lock(redis_client)
+        data_fetch_thread = threading.Thread(
+            target=ingest_engine.run, kwargs={'leader': leader}, name='ingest', daemon=True
+        )
+        data_fetch_thread.start()
+
+    callbacks.register_callbacks(app, sample_cache, person_directory, result_cache)
+
+    # Central monitoring screen: every patient on one canvas, at /ward/.
+    ward_app = Dash(__name__, server=server, url_base_pathname='/ward/', external_stylesheets=external_stylesheets)
+    register_ward_callbacks(ward_app, sample_cache, config.PERSON_IDS)
+    ward_app.layout = lambda: ward_layout(person_directory, config.PERSON_IDS)
+
+    callback_profiler = None
+    if config.PROFILE_SLOW_CALLBACKS_MS:
+        callback_profiler = SlowCallbackProfiler(config.PROFILE_SLOW_CALLBACKS_MS / 1000)
+        callback_profiler.start()
+    register_metrics_route(server, [app, ward_app], ingest_engine, sample_broadcaster, callback_profiler)
+
+    app.layout = lambda: serve_layout(person_directory, live_config)
+    return app
+
+
+def create_server():
+    return create_app().server
 
 
 if __name__ == '__main__':
-    app.run_server(debug=False)
\ No newline at end of file
+    create_app().run_server(debug=False)
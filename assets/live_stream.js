@@ -0,0 +1,127 @@
+/* Push-mode live updates: one EventSource per tab for the selected person.
+ * Every sample updates the feet view and appends to the sensor chart
+ * without a server callback. Configuration comes from the live-config store.
+ * Anomaly episodes are layout shapes; drawEpisodes applies the server's list
+ * in poll mode, onSample grows them sample by sample in push mode.
+ * tick decides per interval whether the server is needed at all: not for a
+ * hidden tab, and not in push mode while both tables are paused on the live
+ * window. Pause state is per tab (a session-storage store). */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    live: {
+        source: null,
+        previous: null,
+
+        chart: function () {
+            return document.querySelector('#sensor-chart .js-plotly-plot');
+        },
+
+        tick: function (n, personId, paused, chartWindow, config) {
+            if (!personId || !config || document.hidden) {
+                return window.dash_clientside.no_update;
+            }
+            paused = paused || {};
+            if (config.push && chartWindow === config.liveWindow && paused.sensors && paused.anomalies) {
+                return window.dash_clientside.no_update;
+            }
+            return n;
+        },
+
+        togglePause: function (sensorClicks, anomalyClicks, paused) {
+            const triggered = window.dash_clientside.callback_context.triggered.map((t) => t.prop_id);
+            paused = Object.assign({sensors: false, anomalies: false}, paused);
+            if (triggered.includes('pause-sensor-button.n_clicks')) {
+                paused.sensors = !paused.sensors;
+            }
+            if (triggered.includes('pause-anomalies-button.n_clicks')) {
+                paused.anomalies = !paused.anomalies;
+            }
+            return paused;
+        },
+
+        pauseIcons: function (paused) {
+            paused = paused || {};
+            return [paused.sensors ? 'fas fa-play' : 'fas fa-pause', paused.anomalies ? 'fas fa-play' : 'fas fa-pause'];
+        },
+
+        sensorData: function (sample, config) {
+            return config.sensors.map((name, i) => ({id: i, name: name, value: sample.values[i]}));
+        },
+
+        drawFeet: function (sample, config) {
+            if (!sample || !config) {
+                return window.dash_clientside.no_update;
+            }
+            return window.dash_clientside.live.sensorData(sample, config);
+        },
+
+        drawEpisodes: function (shapes) {
+            const graph = window.dash_clientside.live.chart();
+            if (graph && graph.layout && shapes) {
+                window.Plotly.relayout(graph, {shapes: shapes});
+            }
+            return window.dash_clientside.no_update;
+        },
+
+        connect: function (personId, config) {
+            const live = window.dash_clientside.live;
+            if (live.source) {
+                live.source.close();
+                live.source = null;
+            }
+            live.previous = null;
+            if (!personId || !config || !config.push) {
+                return null;
+            }
+            live.source = new EventSource(`${config.url}/${personId}`);
+            live.source.onmessage = function (event) {
+                live.onSample(JSON.parse(event.data), config);
+            };
+            return personId;
+        },
+
+        onSample: function (sample, config) {
+            const live = window.dash_clientside.live;
+            window.dash_clientside.set_props('feet-pressure', {sensorData: live.sensorData(sample, config)});
+
+            const previous = live.previous;
+            live.previous = sample;
+            const graph = live.chart();
+            if (!graph || !graph.data || graph.data.length < config.traces.length ||
+                    !graph.layout.meta || !graph.layout.meta.live) {
+                return;
+            }
+            // The figure may already hold this sample if it was built after the
+            // sample arrived; timestamps are zero-padded so strings compare in order.
+            const xs = graph.data[0].x;
+            if (xs && xs.length && xs[xs.length - 1] >= sample.t) {
+                return;
+            }
+            const x = config.sensors.map(() => [sample.t]);
+            const y = sample.values.map((value) => [value]);
+            window.Plotly.extendTraces(graph, {x: x, y: y}, config.traces, config.maxPoints);
+            live.updateEpisodes(graph, sample, previous, config);
+        },
+
+        updateEpisodes: function (graph, sample, previous, config) {
+            const current = graph.layout.shapes || [];
+            let shapes = current.slice();
+            const last = shapes[shapes.length - 1];
+            if (sample.anomaly) {
+                // Same rule as the store: consecutive anomalous samples form one episode.
+                if (last && previous && previous.anomaly && last.x1 === previous.t) {
+                    shapes[shapes.length - 1] = Object.assign({}, last, {x1: sample.t});
+                } else {
+                    shapes.push(Object.assign({}, config.episodeStyle, {x0: sample.t, x1: sample.t}));
+                }
+            }
+            // Drop episodes that scrolled out with the trimmed points and clip the rest.
+            const start = graph.data[0].x[0];
+            shapes = shapes
+                .filter((shape) => shape.x1 >= start)
+                .map((shape) => shape.x0 < start ? Object.assign({}, shape, {x0: start}) : shape);
+            if (sample.anomaly || shapes.length !== current.length || (shapes.length && shapes[0] !== current[0])) {
+                window.Plotly.relayout(graph, {shapes: shapes});
+            }
+        }
+    }
+});
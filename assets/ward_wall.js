@@ -0,0 +1,127 @@
+/* Ward wall: the pressure maps of every patient on one canvas.
+ * ward.draw gets the packed frame from update_ward_frame (base64 persons x 6
+ * uint16 values, plus one anomaly bitmask and one age byte per person) and
+ * repaints only the sensor dots; cell borders, labels and foot outlines are
+ * drawn once per layout into an offscreen background. */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    ward: {
+        cell: {width: 110, height: 150, scale: 0.3, radius: 8, top: 18},
+        // Same coordinates as the Ppdv component (a 300 x 450 box), in sensor order.
+        positions: [[110, 150], [40, 185], [75, 375], [190, 150], [260, 185], [225, 375]],
+        maxValue: 1100,
+        staleAfter: 5,
+        colors: null,
+        background: null,
+        layoutKey: null,
+
+        colorTable: function () {
+            const ward = window.dash_clientside.ward;
+            if (!ward.colors) {
+                ward.colors = [];
+                for (let value = 0; value <= ward.maxValue; value++) {
+                    ward.colors.push(`hsl(${(1 - value / ward.maxValue) * 120}, 100%, 50%)`);
+                }
+            }
+            return ward.colors;
+        },
+
+        decode: function (base64, ArrayType) {
+            // Values are little endian, as is every platform browsers run on.
+            const bytes = Uint8Array.from(atob(base64), (c) => c.charCodeAt(0));
+            return new ArrayType(bytes.buffer);
+        },
+
+        renderBackground: function (config, columns, rows, ratio) {
+            const ward = window.dash_clientside.ward;
+            const cell = ward.cell;
+            const background = document.createElement('canvas');
+            background.width = columns * cell.width * ratio;
+            background.height = rows * cell.height * ratio;
+            const ctx = background.getContext('2d');
+            ctx.scale(ratio, ratio);
+            ctx.font = '11px sans-serif';
+            ctx.textAlign = 'center';
+            config.persons.forEach((personId, p) => {
+                const x0 = (p % columns) * cell.width;
+                const y0 = Math.floor(p / columns) * cell.height;
+                ctx.strokeStyle = '#e9ecef';
+                ctx.lineWidth = 1;
+                ctx.strokeRect(x0 + 0.5, y0 + 0.5, cell.width - 1, cell.height - 1);
+                ctx.fillStyle = '#000';
+                ctx.fillText(config.labels[p], x0 + cell.width / 2, y0 + 13, cell.width - 6);
+                // Foot outlines around each side's sensors.
+                ctx.strokeStyle = '#bbb';
+                [75, 225].forEach((cx) => {
+                    ctx.beginPath();
+                    ctx.ellipse(x0 + 5 + cx * cell.scale, y0 + cell.top + 265 * cell.scale,
+                                55 * cell.scale, 140 * cell.scale, 0, 0, 2 * Math.PI);
+                    ctx.stroke();
+                });
+            });
+            return background;
+        },
+
+        draw: function (frame, config) {
+            const ward = window.dash_clientside.ward;
+            const canvas = document.getElementById('ward-canvas');
+            if (!canvas || !frame || !config) {
+                return window.dash_clientside.no_update;
+            }
+            const cell = ward.cell;
+            const count = config.persons.length;
+            const columns = Math.max(1, Math.floor(canvas.parentElement.clientWidth / cell.width));
+            const rows = Math.ceil(count / columns);
+            const ratio = window.devicePixelRatio || 1;
+            const key = [columns, count, ratio].join();
+            if (ward.layoutKey !== key) {
+                canvas.width = columns * cell.width * ratio;
+                canvas.height = rows * cell.height * ratio;
+                canvas.style.width = `${columns * cell.width}px`;
+                canvas.style.height = `${rows * cell.height}px`;
+                ward.background = ward.renderBackground(config, columns, rows, ratio);
+                ward.layoutKey = key;
+            }
+
+            const ctx = canvas.getContext('2d');
+            ctx.setTransform(1, 0, 0, 1, 0, 0);
+            ctx.clearRect(0, 0, canvas.width, canvas.height);
+            ctx.drawImage(ward.background, 0, 0);
+            ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+
+            const colors = ward.colorTable();
+            const values = ward.decode(frame.values, Uint16Array);
+            const anomaly = ward.decode(frame.anomaly, Uint8Array);
+            const age = ward.decode(frame.age, Uint8Array);
+            const sensors = ward.positions.length;
+            ctx.font = '11px sans-serif';
+            ctx.textAlign = 'center';
+            for (let p = 0; p < count; p++) {
+                const x0 = (p % columns) * cell.width;
+                const y0 = Math.floor(p / columns) * cell.height;
+                if (age[p] > ward.staleAfter) {
+                    ctx.fillStyle = '#999';
+                    ctx.fillText(age[p] === 255 ? 'no data' : `${age[p]} s ago`, x0 + cell.width / 2, y0 + cell.height / 2);
+                    continue;
+                }
+                for (let s = 0; s < sensors; s++) {
+                    const [x, y] = ward.positions[s];
+                    ctx.beginPath();
+                    ctx.arc(x0 + 5 + x * cell.scale, y0 + cell.top + y * cell.scale, cell.radius, 0, 2 * Math.PI);
+                    ctx.fillStyle = colors[Math.min(values[p * sensors + s], ward.maxValue)];
+                    ctx.fill();
+                    if (anomaly[p] >> s & 1) {
+                        ctx.strokeStyle = '#d00';
+                        ctx.lineWidth = 2;
+                        ctx.stroke();
+                    }
+                }
+                if (anomaly[p]) {
+                    ctx.strokeStyle = '#d00';
+                    ctx.lineWidth = 2;
+                    ctx.strokeRect(x0 + 1, y0 + 1, cell.width - 2, cell.height - 2);
+                }
+            }
+            return window.dash_clientside.no_update;
+        }
+    }
+});
@@ -0,0 +1,108 @@
+"""Times every dashboard callback at several history sizes and patient counts.
+
+    python -m benchmarks.bench_callbacks --sizes 610,10000,100000 --persons 1,50 --iterations 50
+
+For each combination, that many persons are seeded with the history size
+(samples, anomalies, episodes and rollups), and successive calls rotate
+through the persons, so per-person sample cache buffers and result cache
+entries compete as they do with many patients on screen. Each callback is
+timed cold, with the shared result cache cleared before every call, and
+warm, as every viewer after the first in a tick would see it. The per-tick callback is on_tick, which absorbed the old
+update_pressure_data.
+"""
+import argparse
+import itertools
+
+from dash import Dash
+from dash.exceptions import PreventUpdate
+
+import config
+from benchmarks.common import fake_redis, HEADER, payload_bytes, report_row, seed_person, timed
+from callbacks.callbacks import register_callbacks
+from callbacks.result_cache import ResultCache
+from storage.cache import SampleCache
+from storage.persons import PersonDirectory
+from storage.redis_store import SampleStore
+
+SENSOR_SORT = [{'column_id': 'L0', 'direction': 'desc'}]
+
+
+def unwrapped_callbacks(app):
+    callbacks = {}
+    for entry in app.callback_map.values():
+        fn = entry.get('callback')
+        if fn is None:
+            continue
+        while hasattr(fn, '__wrapped__'):
+            fn = fn.__wrapped__
+        callbacks[fn.__name__] = fn
+    return callbacks
+
+
+def build(size, persons):
+    redis_client = fake_redis()
+    sample_store = SampleStore(
+        redis_client,
+        sample_retention=size,
+        anomaly_retention_count=size,
+        rollup_tiers=config.ROLLUP_TIERS,
+    )
+    person_ids = list(range(1, persons + 1))
+    for person_id in person_ids:
+        seed_person(sample_store, person_id, size)
+    sample_cache = SampleCache(sample_store, config.SAMPLE_CACHE_CAPACITY, config.ANOMALY_CACHE_CAPACITY)
+    sample_cache.start()
+    # Metadata is seeded, so the directory never reaches for this URL.
+    person_directory = PersonDirectory(sample_store, person_ids, 'http://127.0.0.1:9')
+    result_cache = ResultCache(config.RESULT_CACHE_SIZE)
+    app = Dash(__name__)
+    register_callbacks(app, sample_cache, person_directory, result_cache)
+    return unwrapped_callbacks(app), result_cache, person_ids
+
+
+def cases(callbacks, person_ids):
+    rotation = itertools.cycle(person_ids)
+
+    def on_tick():
+        try:
+            return callbacks['on_tick'](1, next(rotation), 0, 15, [], 0, 15, [], '2m', 0, None, None, {'push': False})
+        except PreventUpdate:
+            return None
+
+    yield 'update_sensor_chart 2m', lambda: callbacks['update_sensor_chart'](next(rotation), '2m')
+    yield 'update_sensor_chart 1h', lambda: callbacks['update_sensor_chart'](next(rotation), '1h')
+    yield 'update_sensor_chart 24h', lambda: callbacks['update_sensor_chart'](next(rotation), '24h')
+    yield 'update_sensor_chart 7d', lambda: callbacks['update_sensor_chart'](next(rotation), '7d')
+    yield 'update_sensor_data_table', lambda: callbacks['update_sensor_data_table'](next(rotation), 0, 15, [])
+    yield 'update_sensor_data_table sorted', lambda: callbacks['update_sensor_data_table'](next(rotation), 0, 15, SENSOR_SORT)
+    yield 'update_anomalies_table', lambda: callbacks['update_anomalies_table'](next(rotation), 0, 15, [])
+    yield 'update_anomalies_table sorted', lambda: callbacks['update_anomalies_table'](next(rotation), 0, 15, SENSOR_SORT)
+    yield 'on_tick (all outputs)', on_tick
+    yield 'display_person_details', lambda: callbacks['display_person_details'](next(rotation), 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default='610,10000,100000', help='comma-separated history sizes')
+    parser.add_argument('--persons', default='1,50', help='comma-separated patient counts')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    print(HEADER)
+    for size in [int(s) for s in args.sizes.split(',')]:
+        for persons in [int(p) for p in args.persons.split(',')]:
+            callbacks, result_cache, person_ids = build(size, persons)
+            for name, fn in cases(callbacks, person_ids):
+                for _ in person_ids:
+                    fn()  # backfills the sample cache for every person
+                label = f'{name} x{persons}' if persons > 1 else name
+                durations, result = timed(fn, args.iterations, before=result_cache.entries.clear)
+                report_row(f'{label} (cold)', size, durations, payload_bytes(result))
+                for _ in person_ids:
+                    fn()  # one result per person in the result cache
+                durations, result = timed(fn, args.iterations)
+                report_row(f'{label} (warm)', size, durations, payload_bytes(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Times ingest cycles against the stand-in monitor for several patient counts.
+
+    python -m benchmarks.bench_ingest --persons 6,50,500 --iterations 20
+
+Each iteration is one IngestEngine.poll_once, the body of every
+fetch_and_store_data tick: fetch all persons concurrently, then write the
+tick to (fake) Redis. Bytes are the upstream JSON received per cycle.
+
+By default the monitor runs in this process and competes with ingest for
+the GIL; pass --monitor-url of a separately started simulator.monitor
+(serving at least as many persons) to time ingest alone.
+"""
+import argparse
+import json
+import logging
+import threading
+
+from werkzeug.serving import make_server
+
+import config
+from benchmarks.common import fake_redis, HEADER, report_row, timed
+from ingest.engine import IngestEngine
+from simulator.monitor import create_app, MonitorSimulator
+from storage.redis_store import SampleStore
+
+
+def start_monitor(persons, latency):
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, create_app(MonitorSimulator(persons), latency=latency), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--persons', default='6,50,500', help='comma-separated patient counts')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated monitor latency in seconds')
+    parser.add_argument('--monitor-url', help='use this monitor instead of an in-process one')
+    args = parser.parse_args()
+
+    print(HEADER)
+    for persons in [int(p) for p in args.persons.split(',')]:
+        server = None if args.monitor_url else start_monitor(persons, args.latency)
+        base_url = args.monitor_url or f'http://127.0.0.1:{server.server_port}'
+        sample_store = SampleStore(
+            fake_redis(),
+            sample_retention=config.SAMPLE_RETENTION_COUNT,
+            anomaly_retention_count=config.ANOMALY_RETENTION_COUNT,
+            anomaly_retention_seconds=config.ANOMALY_RETENTION_SECONDS,
+            rollup_tiers=config.ROLLUP_TIERS,
+        )
+        ticks = []
+
+        def store(samples, tick_time):
+            sample_store.write_tick(samples, tick_time)
+            ticks.append(samples)
+
+        engine = IngestEngine(
+            range(1, persons + 1),
+            base_url,
+            store,
+            timeout=5,
+            max_workers=config.INGEST_WORKERS,
+        )
+        engine.poll_once()  # opens the pooled connections
+        durations, _ = timed(engine.poll_once, args.iterations)
+        nbytes = sum(len(json.dumps(data)) for _, data in ticks[-1])
+        report_row(f'poll_once ({len(ticks[-1])}/{persons} answered)', persons, durations, nbytes)
+        engine.close()
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
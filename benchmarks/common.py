@@ -0,0 +1,124 @@
+"""Shared helpers for the benchmark scripts: seeded data, timing and reporting.
+
+The benchmarks run against fakeredis instead of a Redis server, so absolute
+numbers are higher than in production; compare runs with each other.
+"""
+import json
+import statistics
+import time
+
+import fakeredis
+import numpy as np
+import plotly.utils
+from dash import no_update
+
+from storage.codec import encode_episode, encode_rollup, SAMPLE_DTYPE, SENSOR_NAMES
+from storage.redis_store import anomalies_key, episodes_key, metadata_key, rollup_key, samples_key, version_key
+
+SEED_CHUNK = 10000
+
+
+def fake_redis():
+    return fakeredis.FakeStrictRedis(decode_responses=True)
+
+
+def make_samples(count, anomaly_ratio=0.1, seed=0, end_ms=None):
+    """``count`` SAMPLE_DTYPE records one second apart, ending at ``end_ms`` (now by default)."""
+    rng = np.random.default_rng(seed)
+    end_ms = int(time.time() * 1000) if end_ms is None else end_ms
+    samples = np.zeros(count, dtype=SAMPLE_DTYPE)
+    samples['ts'] = end_ms - 1000 * np.arange(count)[::-1]
+    samples['values'] = rng.integers(0, 1100, size=(count, len(SENSOR_NAMES)))
+    anomalous = rng.random(count) < anomaly_ratio
+    samples['anomaly'][anomalous] = 1 << rng.integers(0, len(SENSOR_NAMES), size=anomalous.sum())
+    return samples
+
+
+def _episodes(samples):
+    # Runs of consecutive anomalous samples, as SampleStore.write_tick would merge them.
+    rows = np.flatnonzero(samples['anomaly'])
+    if not len(rows):
+        return []
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(rows) > 1) + 1))
+    ends = np.concatenate((starts[1:], [len(rows)])) - 1
+    anomalies = samples[rows]
+    sensors = np.bitwise_or.reduceat(anomalies['anomaly'], starts)
+    peaks = np.maximum.reduceat(anomalies['values'], starts)
+    return [
+        (encode_episode(int(anomalies['ts'][s]), int(anomalies['ts'][e]), int(m), p.tolist(), int(e - s + 1)),
+         int(anomalies['ts'][e]))
+        for s, e, m, p in zip(starts, ends, sensors, peaks)
+    ]
+
+
+def _rollups(samples, seconds):
+    buckets = samples['ts'] - samples['ts'] % (seconds * 1000)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    counts = np.diff(np.concatenate((starts, [len(samples)])))
+    values = samples['values']
+    minimum = np.minimum.reduceat(values, starts)
+    total = np.add.reduceat(values.astype(np.uint32), starts)
+    maximum = np.maximum.reduceat(values, starts)
+    anomalies = np.add.reduceat((samples['anomaly'] != 0).astype(np.uint32), starts)
+    return [
+        (encode_rollup(int(buckets[s]), int(c), lo.tolist(), t.tolist(), hi.tolist(), int(a)), int(buckets[s]))
+        for s, c, lo, t, hi, a in zip(starts, counts, minimum, total, maximum, anomalies)
+    ]
+
+
+def _zadd_chunked(redis_client, key, members):
+    for i in range(0, len(members), SEED_CHUNK):
+        redis_client.zadd(key, dict(members[i:i + SEED_CHUNK]))
+
+
+def seed_person(sample_store, person_id, count, anomaly_ratio=0.1, seed=0):
+    """Fills every key SampleStore.write_tick maintains with ``count`` seconds of history."""
+    redis_client = sample_store.redis_client
+    samples = make_samples(count, anomaly_ratio, seed + person_id)
+    records = [(record.tobytes(), int(record['ts'])) for record in samples]
+    anomalous = samples['anomaly'] != 0
+    _zadd_chunked(redis_client, samples_key(person_id), records)
+    _zadd_chunked(redis_client, anomalies_key(person_id), [r for r, a in zip(records, anomalous) if a])
+    _zadd_chunked(redis_client, episodes_key(person_id), _episodes(samples))
+    for seconds, _ in sample_store.rollup_tiers:
+        _zadd_chunked(redis_client, rollup_key(person_id, seconds), _rollups(samples, seconds))
+    redis_client.hset(version_key(person_id), mapping={'samples': count, 'anomalies': int(anomalous.sum())})
+    redis_client.set(metadata_key(person_id), json.dumps({
+        'firstname': f'Person{person_id}', 'lastname': 'Benchmark', 'birthdate': '1970-01-01', 'disabled': False,
+        'sensors': [{'id': i, 'name': name} for i, name in enumerate(SENSOR_NAMES)],
+    }))
+    return samples
+
+
+def timed(fn, iterations, before=None):
+    """Runs ``fn`` ``iterations`` times; returns per-call seconds and the last result."""
+    durations = []
+    result = None
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - started)
+    return durations, result
+
+
+def payload_bytes(result):
+    """Size of ``result`` as Dash would serialise it, leaving out no_update outputs."""
+    if isinstance(result, (list, tuple)):
+        result = [value for value in result if value is not no_update]
+    return len(json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def percentile(durations, q):
+    if len(durations) == 1:
+        return durations[0]
+    return statistics.quantiles(durations, n=100, method='inclusive')[q - 1]
+
+
+HEADER = f"{'benchmark':<44}{'size':>9}{'p50 ms':>10}{'p99 ms':>10}{'bytes':>11}"
+
+
+def report_row(name, size, durations, nbytes):
+    print(f'{name:<44}{size:>9}{percentile(durations, 50) * 1000:>10.2f}{percentile(durations, 99) * 1000:>10.2f}'
+          f'{nbytes:>11}', flush=True)
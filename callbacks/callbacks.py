@@ -1,229 +1,281 @@
-from dash import  html, Input, Output, State, ctx
+from dash import  html, Input, Output, State, no_update, ClientsideFunction
 import plotly.graph_objs as go
-import requests
 from dash.exceptions import PreventUpdate
-import json
-import pandas as pd
-import plotly.express as px
-import plotly.express as px
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
-import callbacks.shared_state as shared_state
+from callbacks.charts import (
+    build_rollup_figure, build_sensor_extension, build_sensor_figure, chart_tier, CHART_WINDOW, CHART_WINDOWS,
+    episode_shapes, LIVE_CHART_WINDOW
+)
+from callbacks.frames import samples_after
+from callbacks.push import sample_payload
+from callbacks.tables import read_table_page, sort_key
+from storage.redis_store import anomalies_key, samples_key
 
 
-def register_callbacks(app, redis_client):
-    
-    def get_last_3_minutes_anomalies_data(person_id):
-        try:
-            anomalies_key = f'person_{person_id}_anomalies'
+def register_callbacks(app, sample_cache, person_directory, result_cache):
+    sample_store = sample_cache.sample_store
 
-            end_time = datetime.now(pytz.timezone('Europe/Warsaw'))
-            start_time = end_time - timedelta(minutes=2)
-
-            anomalies_records = redis_client.lrange(anomalies_key, 0, -1)
-            anomalies_list = [json.loads(record) for record in anomalies_records]
-            anomalies_df = pd.DataFrame(anomalies_list)
-            
-            anomalies_df['timestamp'] = pd.to_datetime(anomalies_df['timestamp']).dt.tz_localize('Europe/Warsaw')
-            filtered_df = anomalies_df[(anomalies_df['timestamp'] >= start_time) ]
-
-            return filtered_df
-        except Exception:
-            return pd.DataFrame()
+    def get_chart_episodes(person_id):
+        start_time = datetime.now(pytz.timezone('Europe/Warsaw')) - CHART_WINDOW
+        return sample_store.read_episodes(person_id, start_time)
 
     def get_last_3_minutes_data(person_id):
-        sensor_data_key = f'person_{person_id}_data_list'
+        start_time = datetime.now(pytz.timezone('Europe/Warsaw')) - CHART_WINDOW
+
+        # A view into the in-process ring buffer, no Redis round trip.
+        return sample_cache.samples(person_id, start_time)
 
-        end_time = datetime.now(pytz.timezone('Europe/Warsaw'))
-        start_time = end_time - timedelta(minutes=2)
+    def sensors_table_page(person_id, page_current, page_size, sort_by):
+        return result_cache.get_or_compute(
+            ('sensors-table', person_id, sample_cache.version(person_id), page_current, page_size, sort_key(sort_by)),
+            lambda: read_table_page(sample_store, samples_key(person_id), page_current, page_size, sort_by)
+        )
 
-        sensor_data_records = redis_client.lrange(sensor_data_key, 0, -1)
-        sensor_data_list = [json.loads(record) for record in sensor_data_records]
-        sensor_df = pd.DataFrame(sensor_data_list)
+    def anomalies_table_page(person_id, page_current, page_size, sort_by):
+        return result_cache.get_or_compute(
+            ('anomalies-table', person_id, sample_cache.version(person_id, 'anomalies'), page_current, page_size, sort_key(sort_by)),
+            lambda: read_table_page(sample_store, anomalies_key(person_id), page_current, page_size, sort_by)
+        )
 
-        sensor_df['timestamp'] = pd.to_datetime(sensor_df['timestamp']).dt.tz_localize('Europe/Warsaw')
-        filtered_df = sensor_df[(sensor_df['timestamp'] >= start_time)]
-        
-        return filtered_df
+    def rollup_chart(person_id, window, tier):
+        # Redrawn from scratch once per bucket; the cursor is the newest
+        # bucket's start, so on_tick can tell when the next one opens.
+        start_time = datetime.now(pytz.timezone('Europe/Warsaw')) - CHART_WINDOWS[window][1]
+        rollups = sample_store.read_rollups(person_id, tier, start_time)
+        cursor = int(rollups['ts'][-1]) if len(rollups) else 0
+        figure = result_cache.get_or_compute(
+            ('sensor-chart', person_id, window, cursor),
+            lambda: build_rollup_figure(
+                rollups, sample_store.read_episodes(person_id, start_time), int(start_time.timestamp() * 1000)
+            )
+        )
+        return figure, cursor
 
     @app.callback(
-        Output('sensor-chart', 'figure'),
-        [Input('interval-update', 'n_intervals'), 
-        Input('person-selector', 'value')]
+        [Output('sensor-chart', 'figure'),
+        Output('sensor-chart-cursor', 'data')],
+        [Input('person-selector', 'value'),
+        Input('chart-window', 'value')]
     )
-    def update_sensor_chart(n, person_id):
+    def update_sensor_chart(person_id, window):
         if not person_id:
-            return go.Figure()
-
-        sensor_data_df = get_last_3_minutes_data(person_id)
-        if sensor_data_df.empty:
-            return go.Figure()
-
-        # Flatten the nested JSON structure
-        exploded_records = []
-        for index, row in sensor_data_df.iterrows():
-            sensors = row['data']['trace']['sensors']
-            for sensor in sensors:
-                exploded_records.append({
-                    'timestamp': row['timestamp'],
-                    'sensor': sensor['name'],
-                    'value': sensor['value']
-                })
-        sensor_records_df = pd.DataFrame(exploded_records)
-
-        # Fetch anomalies data
-        anomalies_df = get_last_3_minutes_anomalies_data(person_id)
-
-
-        # Create the line chart
-        fig = px.line(sensor_records_df, x='timestamp', y='value', color='sensor',
-                    color_discrete_map={
-                        'L0': '#808700', 'L1': '#d7e120', 'L2': '#f2ff00',
-                        'R0': '#0017ff', 'R1': '#182183', 'R2': '#515fe9'  
-                    })
-        
-        fig.add_trace(go.Scatter(
-            x=[None], y=[None], mode='lines',
-            line=dict(color="red", width=2),
-            name='Anomalies'
-        ))
-
-        # Add vertical lines for anomalies
-        if not anomalies_df.empty and 'timestamp' in anomalies_df.columns:
-            for anomaly_time in anomalies_df['timestamp']:
-                fig.add_vline(x=anomaly_time, line_width=2, line_color="red")
-
-        # Update layout
-        fig.update_layout(
-            xaxis_title='Time',
-            yaxis_title='Sensor Value',
-            yaxis=dict(range=[0, 1100]), # Assuming max_sensor_value is defined globally
-            legend_title='Sensor',
-            template='plotly_white'
+            return go.Figure(), None
+
+        window = window or LIVE_CHART_WINDOW
+        tier = chart_tier(window)
+        if tier is not None:
+            return rollup_chart(person_id, window, tier)
+
+        # The full figure is only built when the person or window changes;
+        # after that on_tick (or the push stream) appends the samples past the cursor.
+        samples = get_last_3_minutes_data(person_id)
+        cursor = int(samples['ts'][-1]) if len(samples) else 0
+        figure = result_cache.get_or_compute(
+            ('sensor-chart', person_id, window, cursor),
+            lambda: build_sensor_figure(samples, get_chart_episodes(person_id))
         )
-
-        return fig
+        return figure, cursor
 
     @app.callback(
-        Output('pause-sensor-button', 'children'),
-        [Input('pause-sensor-button', 'n_clicks')],
+        [Output('sensors-table', 'data', allow_duplicate=True),
+        Output('sensors-table', 'page_count', allow_duplicate=True),
+        Output('anomalies-table', 'data', allow_duplicate=True),
+        Output('anomalies-table', 'page_count', allow_duplicate=True),
+        Output('sensor-chart', 'figure', allow_duplicate=True),
+        Output('sensor-chart', 'extendData'),
+        Output('sensor-chart-cursor', 'data', allow_duplicate=True),
+        Output('chart-episodes', 'data'),
+        Output('latest-sample', 'data'),
+        Output('tick-versions', 'data')],
+        [Input('tick-request', 'data')],
+        [State('person-selector', 'value'),
+        State('sensors-table', 'page_current'),
+        State('sensors-table', 'page_size'),
+        State('sensors-table', 'sort_by'),
+        State('anomalies-table', 'page_current'),
+        State('anomalies-table', 'page_size'),
+        State('anomalies-table', 'sort_by'),
+        State('chart-window', 'value'),
+        State('sensor-chart-cursor', 'data'),
+        State('tick-versions', 'data'),
+        State('pause-state', 'data'),
+        State('live-config', 'data')],
         prevent_initial_call=True
     )
-    def toggle_sensor_refreshing(n_clicks):
-        shared_state.toggle_sensor_refreshing()
-        icon_class = "fas fa-play" if shared_state.is_sensor_refreshing_paused else "fas fa-pause"
-        return html.I(className=icon_class)
+    def on_tick(n, person_id, sensors_page, sensors_page_size, sensors_sort_by,
+                anomalies_page, anomalies_page_size, anomalies_sort_by, window, cursor, seen, paused, live_config):
+        # The one server callback per tick, sent only when live.tick decides
+        # this tab needs anything from the server. Ingest bumps per-person
+        # version counters, so a single HMGET tells which outputs have new
+        # data and everything else is answered with no_update.
+        if not person_id:
+            raise PreventUpdate
+        paused = paused or {}
 
-    @app.callback(
-        Output('pause-anomalies-button', 'children'),
-        [Input('pause-anomalies-button', 'n_clicks')],
+        versions = sample_store.read_versions(person_id)
+        versions['person'] = person_id
+        if seen == versions:
+            raise PreventUpdate
+        person_changed = not seen or seen.get('person') != person_id
+        samples_changed = person_changed or seen.get('samples') != versions['samples']
+        anomalies_changed = person_changed or seen.get('anomalies') != versions['anomalies']
+
+        sensors_table = [no_update, no_update]
+        if samples_changed and not paused.get('sensors'):
+            sensors_table = sensors_table_page(person_id, sensors_page, sensors_page_size, sensors_sort_by)
+
+        anomalies_table = [no_update, no_update]
+        if anomalies_changed and not paused.get('anomalies'):
+            anomalies_table = anomalies_table_page(person_id, anomalies_page, anomalies_page_size, anomalies_sort_by)
+
+        window = window or LIVE_CHART_WINDOW
+        tier = chart_tier(window)
+        figure, extend_data, new_cursor, shapes, latest_sample = no_update, no_update, no_update, no_update, no_update
+        if samples_changed and tier is not None and cursor is not None:
+            newest = sample_cache.version(person_id)
+            if newest - newest % (tier * 1000) > cursor:
+                figure, new_cursor = rollup_chart(person_id, window, tier)
+
+        # In push mode the browser gets samples for the chart and feet view
+        # from the stream instead.
+        if samples_changed and not (live_config or {}).get('push'):
+            samples = get_last_3_minutes_data(person_id)
+            new_samples = samples_after(samples, cursor or 0)
+            if tier is None and cursor is not None and len(new_samples):
+                extend_data = build_sensor_extension(new_samples)
+                new_cursor = int(new_samples['ts'][-1])
+                # Shapes scroll out of the window along with the trimmed
+                # points, so they are re-sent whenever the chart moves; every
+                # tab on this person shares one read per new sample.
+                window_start = int(samples['ts'][0])
+                shapes = result_cache.get_or_compute(
+                    ('chart-episodes', person_id, sample_cache.version(person_id), window_start),
+                    lambda: episode_shapes(get_chart_episodes(person_id), window_start)
+                )
+            if len(samples):
+                latest_sample = sample_payload(samples[-1:])
+
+        # A paused table keeps the version it last drew, so it catches up on
+        # the first tick after it is unpaused.
+        rendered = dict(versions)
+        if paused.get('sensors'):
+            rendered['samples'] = None if person_changed else seen.get('samples')
+        if paused.get('anomalies'):
+            rendered['anomalies'] = None if person_changed else seen.get('anomalies')
+
+        return (*sensors_table, *anomalies_table, figure, extend_data, new_cursor, shapes, latest_sample, rendered)
+
+    # Pause state lives in the tab's session storage, and the interval only
+    # reaches the server (through tick-request) when something unpaused needs it.
+    app.clientside_callback(
+        ClientsideFunction(namespace='live', function_name='tick'),
+        Output('tick-request', 'data'),
+        [Input('interval-update', 'n_intervals')],
+        [State('person-selector', 'value'),
+        State('pause-state', 'data'),
+        State('chart-window', 'value'),
+        State('live-config', 'data')],
         prevent_initial_call=True
     )
-    def toggle_anomalies_refreshing(n_clicks):
-        shared_state.toggle_anomalies_refreshing()
-        icon_class = "fas fa-play" if shared_state.is_anomalies_refreshing_paused else "fas fa-pause"
-        return html.I(className=icon_class)
 
+    app.clientside_callback(
+        ClientsideFunction(namespace='live', function_name='togglePause'),
+        Output('pause-state', 'data'),
+        [Input('pause-sensor-button', 'n_clicks'),
+        Input('pause-anomalies-button', 'n_clicks')],
+        [State('pause-state', 'data')],
+        prevent_initial_call=True
+    )
 
-    @app.callback(
-        Output('anomalies-table', 'data'),
-        [Input('interval-update', 'n_intervals'), 
-        Input('person-selector', 'value')]
+    app.clientside_callback(
+        ClientsideFunction(namespace='live', function_name='pauseIcons'),
+        [Output('pause-sensor-icon', 'className'),
+        Output('pause-anomalies-icon', 'className')],
+        [Input('pause-state', 'data')]
     )
-    def update_anomalies_table(n, person_id):
-        if not person_id or shared_state.is_anomalies_refreshing_paused:
-            raise PreventUpdate
-        
-        
-        if not person_id:
-            return []
-        
 
-        if not person_id:
-            return []
-        
-        try:
-            anomalies_key = f'person_{person_id}_anomalies'
-            sensor_data_records = redis_client.lrange(anomalies_key, 0, -1)
+    # Poll mode: on_tick sends the newest sample and the feet view is drawn
+    # from it in the browser, as push mode does for streamed samples.
+    app.clientside_callback(
+        ClientsideFunction(namespace='live', function_name='drawFeet'),
+        Output('feet-pressure', 'sensorData'),
+        [Input('latest-sample', 'data')],
+        [State('live-config', 'data')],
+        prevent_initial_call=True
+    )
 
-            if not sensor_data_records:
-                return []
+    app.clientside_callback(
+        ClientsideFunction(namespace='live', function_name='drawEpisodes'),
+        Output('chart-episodes', 'id'),
+        [Input('chart-episodes', 'data')],
+        prevent_initial_call=True
+    )
 
-            # Convert to DataFrame
-            df = pd.DataFrame([json.loads(record) for record in sensor_data_records])
-            df = df.assign(**{sensor['name']: sensor['value'] for record in df['data'] for sensor in record['trace']['sensors']})
-            df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize('Europe/Warsaw')
+    # Push mode: the browser subscribes to /stream/<person_id> and applies
+    # samples to the chart and feet view itself.
+    app.clientside_callback(
+        ClientsideFunction(namespace='live', function_name='connect'),
+        Output('live-stream', 'data'),
+        [Input('person-selector', 'value')],
+        [State('live-config', 'data')]
+    )
 
-            # Sort by timestamp in descending order
-            df_sorted = df.sort_values(by='timestamp', ascending=False)
+    @app.callback(
+        [Output('sensors-export', 'href'),
+        Output('anomalies-export', 'href')],
+        [Input('person-selector', 'value')]
+    )
+    def update_export_links(person_id):
+        if not person_id:
+            return '', ''
+        return f'/export/samples.csv?persons={person_id}', f'/export/anomalies.csv?persons={person_id}'
 
-            return df_sorted[['timestamp'] + [sensor['name'] for sensor in df['data'][0]['trace']['sensors']]].to_dict('records')
-        except Exception as e:
-            return []
+
+    @app.callback(
+        [Output('anomalies-table', 'data'),
+        Output('anomalies-table', 'page_count')],
+        [Input('person-selector', 'value'),
+        Input('anomalies-table', 'page_current'),
+        Input('anomalies-table', 'page_size'),
+        Input('anomalies-table', 'sort_by')]
+    )
+    def update_anomalies_table(person_id, page_current, page_size, sort_by):
+        if not person_id:
+            raise PreventUpdate
+
+        return anomalies_table_page(person_id, page_current, page_size, sort_by)
 
 
     @app.callback(
-        Output('sensors-table', 'data'),
-        [Input('interval-update', 'n_intervals'), 
-        Input('person-selector', 'value')],
-        [State('sensors-table', 'data')],
+        [Output('sensors-table', 'data'),
+        Output('sensors-table', 'page_count')],
+        [Input('person-selector', 'value'),
+        Input('sensors-table', 'page_current'),
+        Input('sensors-table', 'page_size'),
+        Input('sensors-table', 'sort_by')]
     )
-    def update_sensor_data_table(n, person_id, rows):
+    def update_sensor_data_table(person_id, page_current, page_size, sort_by):
         if not person_id:
             raise PreventUpdate
-        
-        triggered_id = ctx.triggered_id 
-        if triggered_id == 'person-selector' or rows == None :
-            try:
-                sensor_data_key = f'person_{person_id}_data_list'
-                sensor_data_records = redis_client.lrange(sensor_data_key, 0, -1)
-
-                if not sensor_data_records:
-                    return []
-
-                # Convert to DataFrame
-                df = pd.DataFrame([json.loads(record) for record in sensor_data_records])
-                df = df.assign(**{sensor['name']: sensor['value'] for record in df['data'] for sensor in record['trace']['sensors']})
-                df['timestamp'] = pd.to_datetime(df['timestamp']).dt.tz_localize('Europe/Warsaw')
-
-                # Sort by timestamp in descending order
-                df_sorted = df.sort_values(by='timestamp', ascending=False)
-
-                return df_sorted[['timestamp'] + [sensor['name'] for sensor in df['data'][0]['trace']['sensors']]].to_dict('records')
-            except Exception as e:
-                return []
-        else:
-            if shared_state.is_sensor_refreshing_paused:
-                raise PreventUpdate
-        
-            last_record = redis_client.lrange(f'person_{person_id}_data_list', -1, -1)
-            if not last_record:
-                print(1)
-                return rows
-
-            # Deserialize the latest record
-            new_data = json.loads(last_record[0])
-            
-            new_row = {'timestamp': pd.to_datetime(new_data['timestamp']).tz_localize('Europe/Warsaw')}
-            for sensor in new_data['data']['trace']['sensors']:
-                new_row[sensor['name']] = sensor['value']
-                
-            rows.insert(0, new_row)
-
-            return rows
+
+        return sensors_table_page(person_id, page_current, page_size, sort_by)
 
     @app.callback(
-        Output('person-details', 'children'),
-        [Input('person-selector', 'value')]
+        [Output('person-details', 'children'),
+        Output('person-details-retry', 'disabled')],
+        [Input('person-selector', 'value'),
+        Input('person-details-retry', 'n_intervals')]
     )
-    def display_person_details(person_id):
-        redis_client.set('some_key', 'some_value')
+    def display_person_details(person_id, n):
         if not person_id:
-            return "Select a person to see their details."
+            return "Select a person to see their details.", True
 
-        response = requests.get(f'http://tesla.iem.pw.edu.pl:9080/v2/monitor/{person_id}')
-        if response.status_code == 200:
-            person_data = response.json()
+        person_data = person_directory.get(person_id)
+        if person_data is None and person_directory.is_fetching(person_id):
+            # Fetched in the background; look again on the next retry tick.
+            return "Loading person details...", False
+        if person_data is not None:
             details_style = {
                 'border': '1px solid #ddd',
                 'padding': '10px',
@@ -267,31 +319,6 @@ def register_callbacks(app, redis_client):
                 ], style=detail_row_style)
             ], style=details_style)
 
-            return details
+            return details, True
         else:
-            return "Failed to load person details."
-
-    @app.callback(
-        Output('feet-pressure', 'sensorData'),
-        [Input('interval-update', 'n_intervals')],
-        [State('person-selector', 'value')]
-    )
-    def update_pressure_data(n, person_id):
-        if not person_id:
-            return []
-        
-        try:
-            # Fetch the last record from Redis list
-            last_record = redis_client.lrange(f'person_{person_id}_data_list', -1, -1)
-            if last_record:
-                data = json.loads(last_record[0])  # Parse the latest JSON data from Redis
-                sensors_data = data['data']['trace']['sensors']
-                formatted_data = [
-                    {'id': sensor['id'], 'name': sensor['name'], 'value': sensor['value']}
-                    for sensor in sensors_data
-                ]
-                return formatted_data
-        except Exception as e:
-            print(f"Error fetching or processing latest sensor data for person {person_id}: {e}")
-
-        return []
\ No newline at end of file
+            return "Failed to load person details.", True
@@ -0,0 +1,156 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+import plotly.graph_objs as go
+
+import config
+from callbacks.downsample import lttb_indices
+from callbacks.frames import epoch_ms_to_datetimes
+from storage.codec import SENSOR_NAMES
+
+SENSOR_COLORS = {
+    'L0': '#808700', 'L1': '#d7e120', 'L2': '#f2ff00',
+    'R0': '#0017ff', 'R1': '#182183', 'R2': '#515fe9'
+}
+MAX_SENSOR_VALUE = 1100
+CHART_WINDOW = timedelta(minutes=2)
+CHART_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+# Selectable chart windows. The live window is drawn from raw samples and
+# extended in place; longer ones are drawn from a rollup tier (see
+# chart_tier) and redrawn whenever a new bucket opens.
+CHART_WINDOWS = {
+    '2m': ('2 min', CHART_WINDOW),
+    '1h': ('1 hour', timedelta(hours=1)),
+    '24h': ('24 hours', timedelta(days=1)),
+    '7d': ('7 days', timedelta(days=7)),
+}
+LIVE_CHART_WINDOW = '2m'
+
+# Trace layout of the sensor chart: one line per sensor, then an empty trace
+# that only provides the legend entry for the anomaly shading.
+CHART_TRACES = list(range(len(SENSOR_NAMES)))
+
+# extendData keeps each trace to one window's worth of points.
+WINDOW_POINTS = math.ceil(CHART_WINDOW.total_seconds() / config.POLL_INTERVAL)
+MAX_POINTS = [WINDOW_POINTS] * len(SENSOR_NAMES)
+
+# Anomaly episodes are shaded as full-height rectangles behind the lines; a
+# single-sample episode has no width and shows as just the outline.
+EPISODE_STYLE = dict(
+    type='rect', xref='x', yref='paper', y0=0, y1=1, layer='below',
+    fillcolor='rgba(255, 0, 0, 0.2)', line=dict(color='red', width=1)
+)
+
+
+def format_chart_times(ts):
+    # Millisecond precision; %f alone would print microseconds.
+    return [timestamp[:-3] for timestamp in epoch_ms_to_datetimes(ts).strftime(CHART_TIMESTAMP_FORMAT)]
+
+
+def chart_timestamps(samples):
+    return format_chart_times(samples['ts'])
+
+
+def chart_tier(window):
+    """Bucket seconds of the rollup tier to draw ``window`` from, or None for raw samples.
+
+    That is the finest tier that still retains the whole window, falling back
+    to the longest-lived one.
+    """
+    duration = CHART_WINDOWS[window][1].total_seconds()
+    if window == LIVE_CHART_WINDOW or not config.ROLLUP_TIERS:
+        return None
+    for seconds, retention in sorted(config.ROLLUP_TIERS):
+        if retention >= duration:
+            return seconds
+    return max(config.ROLLUP_TIERS, key=lambda tier: tier[1])[0]
+
+
+def episode_shapes(episodes, window_start=None):
+    """One EPISODE_STYLE rectangle per episode, clipped to start no earlier than epoch ms ``window_start``."""
+    starts = episodes['start']
+    if window_start is not None:
+        starts = starts.clip(min=window_start)
+    return [
+        dict(EPISODE_STYLE, x0=x0, x1=x1)
+        for x0, x1 in zip(format_chart_times(starts), format_chart_times(episodes['end']))
+    ]
+
+
+def merge_episodes(episodes, min_gap):
+    """Coalesces episodes less than ``min_gap`` ms apart, which would be drawn on top of each other anyway."""
+    if len(episodes) < 2:
+        return episodes
+    breaks = np.flatnonzero(episodes['start'][1:] - episodes['end'][:-1] > min_gap) + 1
+    starts = np.concatenate(([0], breaks))
+    merged = episodes[starts].copy()
+    merged['end'] = np.maximum.reduceat(episodes['end'], starts)
+    return merged
+
+
+def style_sensor_figure(fig, shapes, live):
+    fig.add_trace(go.Scatter(
+        x=[None], y=[None], mode='lines',
+        line=dict(color="red", width=2),
+        name='Anomalies', hoverinfo='skip'
+    ))
+    fig.update_layout(
+        shapes=shapes,
+        # Tells the push stream whether it may append raw samples to this chart.
+        meta=dict(live=live),
+        xaxis_title='Time',
+        yaxis_title='Sensor Value',
+        yaxis=dict(range=[0, MAX_SENSOR_VALUE]),
+        legend_title='Sensor',
+        template='plotly_white'
+    )
+    return fig
+
+
+def build_sensor_figure(samples, episodes):
+    timestamps = chart_timestamps(samples)
+    fig = go.Figure([
+        go.Scatter(x=timestamps, y=samples['values'][:, i], mode='lines', name=name,
+                   line=dict(color=SENSOR_COLORS[name]))
+        for i, name in enumerate(SENSOR_NAMES)
+    ])
+
+    window_start = int(samples['ts'][0]) if len(samples) else None
+    return style_sensor_figure(fig, episode_shapes(episodes, window_start), live=True)
+
+
+def build_rollup_figure(rollups, episodes, window_start, max_points=None):
+    """A sensor chart of per-bucket means, LTTB-downsampled to at most ``max_points`` per sensor.
+
+    Hovering a point shows the bucket's min and max as well.
+    """
+    max_points = max_points or config.CHART_MAX_POINTS
+    means = rollups['sum'] / np.maximum(rollups['count'], 1)[:, None]
+    indices = lttb_indices(rollups['ts'], means, max_points)
+    traces = []
+    for i, name in enumerate(SENSOR_NAMES):
+        rows = indices[:, i]
+        traces.append(go.Scatter(
+            x=format_chart_times(rollups['ts'][rows]), y=means[rows, i].round(1), mode='lines', name=name,
+            line=dict(color=SENSOR_COLORS[name]),
+            customdata=np.stack([rollups['min'][rows, i], rollups['max'][rows, i]], axis=1),
+            hovertemplate='%{y} (min %{customdata[0]}, max %{customdata[1]})'
+        ))
+    fig = go.Figure(traces)
+
+    if len(rollups):
+        span = int(rollups['ts'][-1]) - window_start
+        episodes = merge_episodes(episodes, span // max_points)
+    return style_sensor_figure(fig, episode_shapes(episodes, window_start), live=False)
+
+
+def build_sensor_extension(samples):
+    """``extendData`` that appends new samples to a build_sensor_figure chart."""
+    timestamps = chart_timestamps(samples)
+    update = {
+        'x': [timestamps] * len(SENSOR_NAMES),
+        'y': samples['values'].T.tolist(),
+    }
+    return [update, CHART_TRACES, MAX_POINTS]
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of several series sharing ``x``.
+
+    ``y`` is an (n, k) array of k series. Returns an (m, k) array of row
+    indices, m = min(n, threshold), choosing the points of each series
+    independently. The first and last points are always kept.
+    """
+    n, k = y.shape
+    if threshold >= n or threshold < 3:
+        return np.repeat(np.arange(n)[:, None], k, axis=1)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    columns = np.arange(k)
+    every = (n - 2) / (threshold - 2)
+    bounds = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+
+    indices = np.empty((threshold, k), dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = indices[0]
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        # Average of the next bucket (the last point for the final bucket).
+        next_end = bounds[i + 2] if i + 2 < len(bounds) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean(axis=0)
+
+        ax, ay = x[selected], y[selected, columns]
+        areas = np.abs((ax - avg_x) * (y[start:end] - ay) - (ax - x[start:end, None]) * (avg_y - ay))
+        selected = start + areas.argmax(axis=0)
+        indices[i + 1] = selected
+    return indices
@@ -0,0 +1,155 @@
+import io
+
+import numpy as np
+import pandas as pd
+from flask import abort, request, Response, stream_with_context
+
+from callbacks.frames import samples_after, samples_to_frame, TIMEZONE
+from storage.codec import SENSOR_NAMES
+from storage.redis_store import anomalies_key, samples_key
+
+EXPORT_KINDS = ('samples', 'anomalies')
+EXPORT_FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+EXPORT_CHUNK_ROWS = 10000
+
+# Sensor names for every possible anomaly bitmask, e.g. 0b101 -> 'L0 L2'.
+ANOMALY_LABELS = np.array([
+    ' '.join(name for i, name in enumerate(SENSOR_NAMES) if mask >> i & 1)
+    for mask in range(1 << len(SENSOR_NAMES))
+])
+
+
+def parse_time(value):
+    """Epoch seconds or an ISO 8601 timestamp (local time if it has no offset); None passes through."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize(TIMEZONE) if timestamp.tzinfo is None else timestamp
+
+
+def export_chunks(sample_store, history_store, person_id, kind, start_time, end_time):
+    """SAMPLE_DTYPE arrays of at most EXPORT_CHUNK_ROWS covering the range, oldest first.
+
+    Reads the on-disk history partition by partition, then whatever Redis
+    holds past its end (the samples not flushed yet). Without a history
+    store only Redis is read.
+    """
+    last_ts = None
+    if history_store is not None:
+        for view in history_store.iter_range(person_id, start_time, end_time):
+            for i in range(0, len(view), EXPORT_CHUNK_ROWS):
+                chunk = view[i:i + EXPORT_CHUNK_ROWS]
+                last_ts = int(chunk['ts'][-1])
+                yield chunk
+        recent = sample_store.read_range(samples_key(person_id), start_time, end_time)
+    else:
+        key = anomalies_key(person_id) if kind == 'anomalies' else samples_key(person_id)
+        recent = sample_store.read_range(key, start_time, end_time)
+    if last_ts is not None:
+        recent = samples_after(recent, last_ts)
+    for i in range(0, len(recent), EXPORT_CHUNK_ROWS):
+        yield recent[i:i + EXPORT_CHUNK_ROWS]
+
+
+def export_frame(person_id, samples):
+    df = samples_to_frame(samples)
+    df.insert(0, 'person_id', person_id)
+    df['anomaly'] = ANOMALY_LABELS[samples['anomaly']]
+    return df
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file object that hands out whatever was written since the
+    # last drain(), so a Parquet writer can feed a streamed response.
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def csv_stream(frames):
+    header = True
+    for df in frames:
+        yield df.to_csv(index=False, header=header)
+        header = False
+
+
+def parquet_stream(frames):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    writer = None
+    for df in frames:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def register_export_route(server, sample_store, history_store, person_ids):
+    # Responses are generated chunk by chunk: memory stays at one chunk per
+    # request however long the range, and no callback worker is involved.
+    @server.route('/export/<kind>.<fmt>')
+    def export_samples(kind, fmt):
+        """Samples or anomalies as CSV or Parquet.
+
+        Query parameters: ``persons`` (comma-separated ids, default all),
+        ``start`` and ``end`` (epoch seconds or ISO 8601, default open).
+        """
+        if kind not in EXPORT_KINDS or fmt not in EXPORT_FORMATS:
+            abort(404)
+        try:
+            persons = [int(p) for p in request.args.get('persons', '').split(',') if p.strip()] or person_ids
+            start_time = parse_time(request.args.get('start'))
+            end_time = parse_time(request.args.get('end'))
+        except ValueError as e:
+            abort(400, description=str(e))
+        if history_store is not None and history_store.is_empty():
+            # Most likely ingest runs elsewhere and writes a history this
+            # process can't see; Redis alone would silently cut the export
+            # down to its last few minutes.
+            abort(503, description=f'No sample history under {history_store.root!r} yet. '
+                                   'The web and ingest processes must share PPDV_HISTORY_DIR.')
+        if fmt == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                abort(501, description='Parquet export requires pyarrow')
+
+        def frames():
+            for person_id in persons:
+                for chunk in export_chunks(sample_store, history_store, person_id, kind, start_time, end_time):
+                    if kind == 'anomalies':
+                        chunk = chunk[chunk['anomaly'] != 0]
+                    if len(chunk):
+                        yield export_frame(person_id, chunk)
+
+        body = csv_stream(frames()) if fmt == 'csv' else parquet_stream(frames())
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename={kind}.{fmt}'},
+        )
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from storage.codec import SENSOR_NAMES
+
+TIMEZONE = 'Europe/Warsaw'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+TABLE_COLUMNS = ('timestamp',) + SENSOR_NAMES
+
+
+# Shared decoding layer: everything here takes a SAMPLE_DTYPE array (from the
+# sample cache or the store) and converts it column-wise, never per record.
+
+def epoch_ms_to_datetimes(ts):
+    return pd.to_datetime(ts, unit='ms', utc=True).tz_convert(TIMEZONE)
+
+
+def sample_timestamps(samples):
+    return epoch_ms_to_datetimes(samples['ts'])
+
+
+def samples_after(samples, ts):
+    """The tail of a time-ordered ``samples`` array strictly newer than epoch ms ``ts``."""
+    return samples[np.searchsorted(samples['ts'], ts, side='right'):]
+
+
+def samples_to_frame(samples):
+    """A (timestamp x L0..R2) DataFrame, one row per sample."""
+    df = pd.DataFrame(samples['values'], columns=list(SENSOR_NAMES))
+    df.insert(0, 'timestamp', sample_timestamps(samples))
+    return df
+
+
+def samples_to_records(samples, newest_first=True):
+    """DataTable rows for ``samples``, newest first by default."""
+    if newest_first:
+        samples = samples[::-1]
+    timestamps = sample_timestamps(samples).strftime(TIMESTAMP_FORMAT)
+    return [dict(zip(TABLE_COLUMNS, (timestamp, *values)))
+            for timestamp, values in zip(timestamps, samples['values'].tolist())]
+
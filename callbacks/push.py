@@ -0,0 +1,91 @@
+import json
+import queue
+import threading
+
+from flask import Response, stream_with_context
+
+from callbacks.charts import chart_timestamps
+
+
+def sample_payload(samples):
+    """The browser's form of a single-sample SAMPLE_DTYPE array, as streamed and as stored in latest-sample."""
+    sample = samples[0]
+    return {
+        'ts': int(sample['ts']),
+        't': chart_timestamps(samples)[0],
+        'values': sample['values'].tolist(),
+        'anomaly': int(sample['anomaly']),
+    }
+
+
+def sample_event(samples):
+    """One Server-Sent Events message for a single-sample SAMPLE_DTYPE array."""
+    return f'data: {json.dumps(sample_payload(samples))}\n\n'.encode()
+
+
+class SampleBroadcaster:
+    """Fans each new sample out to every stream client watching that person.
+
+    A sample is serialised once no matter how many clients are subscribed.
+    Each client gets a bounded queue; one that can't keep up misses samples
+    instead of holding memory for the others.
+    """
+
+    def __init__(self, max_queue=32):
+        self.max_queue = max_queue
+        self.subscribers = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, person_id):
+        client_queue = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.setdefault(person_id, set()).add(client_queue)
+        return client_queue
+
+    def unsubscribe(self, person_id, client_queue):
+        with self.lock:
+            queues = self.subscribers.get(person_id)
+            if queues is not None:
+                queues.discard(client_queue)
+                if not queues:
+                    del self.subscribers[person_id]
+
+    def publish(self, entries):
+        with self.lock:
+            watched = {person_id: list(queues) for person_id, queues in self.subscribers.items()}
+        if not watched:
+            return
+        for i, person_id in enumerate(entries['person_id'].tolist()):
+            queues = watched.get(person_id)
+            if not queues:
+                continue
+            message = sample_event(entries['sample'][i:i + 1])
+            for client_queue in queues:
+                try:
+                    client_queue.put_nowait(message)
+                except queue.Full:
+                    pass
+
+
+def register_stream_route(server, broadcaster, heartbeat=15):
+    # Each open stream holds a worker thread; run behind a threaded or
+    # gevent worker rather than plain sync workers.
+    @server.route('/stream/<int:person_id>')
+    def stream_samples(person_id):
+        def events():
+            client_queue = broadcaster.subscribe(person_id)
+            try:
+                yield b'retry: 3000\n\n'
+                while True:
+                    try:
+                        yield client_queue.get(timeout=heartbeat)
+                    except queue.Empty:
+                        yield b': keep-alive\n\n'
+            finally:
+                broadcaster.unsubscribe(person_id, client_queue)
+
+        return Response(
+            stream_with_context(events()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
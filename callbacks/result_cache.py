@@ -0,0 +1,99 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+import plotly.utils
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """Bounded LRU of callback results shared by every session in a process.
+
+    Keys look like ``(view, person_id, version, *view_args)`` where
+    ``version`` is the timestamp of the person's newest sample, so all
+    viewers of one patient reuse a single computation per tick and entries
+    for older ticks simply age out. Concurrent misses on the same key are
+    collapsed into one computation.
+
+    With ``redis_client`` set, results are also shared between worker
+    processes as JSON with a short TTL; values read back from Redis are
+    plain JSON (e.g. a figure comes back as a dict), which Dash accepts.
+    """
+
+    def __init__(self, max_entries=512, redis_client=None, ttl=10):
+        self.max_entries = max_entries
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+    def _get_local(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return True, self.entries[key]
+        return False, None
+
+    def _put_local(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _redis_key(self, key):
+        return 'result_cache:' + json.dumps(key, separators=(',', ':'))
+
+    def _get_shared(self, key):
+        try:
+            value = self.redis_client.get(self._redis_key(key))
+        except redis.RedisError as e:
+            logger.warning("Result cache read failed: %s", e)
+            return False, None
+        if value is None:
+            return False, None
+        return True, json.loads(value)
+
+    def _put_shared(self, key, value):
+        try:
+            payload = json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder)
+            self.redis_client.set(self._redis_key(key), payload, ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning("Result cache write failed: %s", e)
+
+    def get_or_compute(self, key, compute):
+        found, value = self._get_local(key)
+        if found:
+            return value
+
+        # Single-flight: the first miss computes, concurrent ones wait for it.
+        with self.lock:
+            event = self.in_flight.get(key)
+            leader = event is None
+            if leader:
+                event = self.in_flight[key] = threading.Event()
+        if not leader:
+            event.wait()
+            found, value = self._get_local(key)
+            if found:
+                return value
+            return compute()
+
+        try:
+            found = False
+            if self.redis_client is not None:
+                found, value = self._get_shared(key)
+            if not found:
+                value = compute()
+                if self.redis_client is not None:
+                    self._put_shared(key, value)
+            self._put_local(key, value)
+            return value
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            event.set()
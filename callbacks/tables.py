@@ -0,0 +1,37 @@
+import math
+
+import numpy as np
+
+from callbacks.frames import samples_to_records
+from storage.codec import SENSOR_INDEX
+
+DEFAULT_SORT = {'column_id': 'timestamp', 'direction': 'desc'}
+
+
+def sort_key(sort_by):
+    """A hashable form of a DataTable ``sort_by`` value, for cache keys."""
+    return tuple((sort['column_id'], sort['direction']) for sort in sort_by or [])
+
+
+def read_table_page(sample_store, key, page_current, page_size, sort_by):
+    """Rows and page count for one page of a ``page_action='custom'`` DataTable.
+
+    Sorting by timestamp is a rank range on the sorted set, so only the
+    visible rows leave Redis. Sorting by a sensor column needs the whole set,
+    which is bounded by the retention policy, and is done with one argsort.
+    """
+    offset = (page_current or 0) * page_size
+    sort = sort_by[0] if sort_by else DEFAULT_SORT
+    descending = sort['direction'] == 'desc'
+
+    if sort['column_id'] == 'timestamp':
+        total, samples = sample_store.read_page(key, offset, page_size, newest_first=descending)
+    else:
+        samples = sample_store.read_range(key)
+        total = len(samples)
+        order = np.argsort(samples['values'][:, SENSOR_INDEX[sort['column_id']]], kind='stable')
+        if descending:
+            order = order[::-1]
+        samples = samples[order[offset:offset + page_size]]
+
+    return samples_to_records(samples, newest_first=False), max(1, math.ceil(total / page_size))
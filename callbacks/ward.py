@@ -0,0 +1,90 @@
+import base64
+import time
+
+import numpy as np
+from dash import dcc, html, Input, Output, State, ClientsideFunction
+from dash.exceptions import PreventUpdate
+
+from storage.codec import SENSOR_NAMES
+
+# Ages are sent as one byte; anything older (or never seen) reads as 255 s.
+MAX_AGE = 255
+
+
+def pack_ward_frame(latest, now_ms):
+    """One ward update for a SAMPLE_DTYPE array of the newest sample per person.
+
+    ``values`` is the persons x 6 uint16 matrix, row-major and little endian,
+    base64 encoded; ``anomaly`` the per-person sensor bitmask and ``age`` the
+    seconds since each person's sample, one byte each.
+    """
+    ages = np.where(latest['ts'] > 0, (now_ms - latest['ts']) // 1000, MAX_AGE).clip(0, MAX_AGE)
+    return {
+        'version': int(latest['ts'].max(initial=0)),
+        'values': base64.b64encode(latest['values'].astype('<u2').tobytes()).decode(),
+        'anomaly': base64.b64encode(latest['anomaly'].astype('u1').tobytes()).decode(),
+        'age': base64.b64encode(ages.astype('u1').tobytes()).decode(),
+    }
+
+
+def ward_layout(person_directory, person_ids):
+    metadata = person_directory.get_many(person_ids, fetch=False)
+    labels = [
+        f"{metadata[person_id].get('firstname', '')} {metadata[person_id].get('lastname', '')}".strip()
+        if person_id in metadata else f'Person {person_id}'
+        for person_id in person_ids
+    ]
+    return html.Div([
+        html.H1('Ward overview', style={'textAlign': 'center', 'color': '#000000', 'fontSize': '2.5em', 'margin': '0', 'padding-top': '20px', 'padding-bottom': '20px'}),
+        html.Div([
+            html.A('Patient dashboard', href='/'),
+        ], style={'textAlign': 'center', 'marginBottom': '10px'}),
+        html.Div([
+            html.Canvas(id='ward-canvas'),
+        ], style={
+            'padding': '20px',
+            'margin': '10px',
+            'border': '1px solid #e9ecef',
+            'borderRadius': '5px',
+            'backgroundColor': '#fff',
+            'boxShadow': '0 4px 8px 0 rgba(0,0,0,0.2)',
+        }),
+        dcc.Interval(id='ward-interval', interval=1000, n_intervals=0),
+        dcc.Store(id='ward-frame'),
+        dcc.Store(id='ward-config', data={
+            'persons': person_ids,
+            'labels': labels,
+            'sensors': list(SENSOR_NAMES),
+        }),
+    ])
+
+
+def register_ward_callbacks(app, sample_cache, person_ids):
+    """The ward wall: one callback per tick for every patient, drawn on a single canvas.
+
+    The server answers with the newest sample of every person packed into a
+    few base64 strings (see ``pack_ward_frame``); ``ward.draw`` in
+    assets/ward_wall.js decodes them and repaints the canvas.
+    """
+    person_ids = list(person_ids)
+
+    @app.callback(
+        Output('ward-frame', 'data'),
+        [Input('ward-interval', 'n_intervals')],
+        [State('ward-frame', 'data')]
+    )
+    def update_ward_frame(n, previous):
+        now_ms = int(time.time() * 1000)
+        latest = sample_cache.latest_many(person_ids)
+        # Skip ticks with no new sample, but let ages tick over every few seconds.
+        if previous and previous['version'] == int(latest['ts'].max(initial=0)) and n % 5:
+            raise PreventUpdate
+        return pack_ward_frame(latest, now_ms)
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='ward', function_name='draw'),
+        Output('ward-canvas', 'id'),
+        [Input('ward-frame', 'data')],
+        [State('ward-config', 'data')],
+        prevent_initial_call=True
+    )
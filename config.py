@@ -0,0 +1,104 @@
+import os
+
+
+def parse_person_ids(spec):
+    # Accepts "1-6", "1,2,5" or a mix of both ("1-3,7"). "@path" reads the
+    # same format from a file, one entry per line or comma-separated, for
+    # fleets too large to list in an environment variable.
+    if spec.startswith('@'):
+        with open(spec[1:]) as f:
+            spec = f.read().replace('\n', ',')
+    person_ids = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            person_ids.extend(range(int(first), int(last) + 1))
+        else:
+            person_ids.append(int(part))
+    return person_ids
+
+
+MONITOR_BASE_URL = os.environ.get('PPDV_MONITOR_URL', 'http://tesla.iem.pw.edu.pl:9080').rstrip('/')
+PERSON_IDS = parse_person_ids(os.environ.get('PPDV_PERSON_IDS', '1-6'))
+
+# Ingest schedule: one tick every POLL_INTERVAL seconds, each upstream request
+# bounded by REQUEST_TIMEOUT so a slow monitor can't stall the whole tick.
+POLL_INTERVAL = float(os.environ.get('PPDV_POLL_INTERVAL', '1.0'))
+REQUEST_TIMEOUT = float(os.environ.get('PPDV_REQUEST_TIMEOUT', '0.8'))
+INGEST_WORKERS = int(os.environ.get('PPDV_INGEST_WORKERS', '32'))
+
+# Where ingest runs. With INGEST_IN_WEB every web process also runs the
+# ingest loop, and a Redis lease (held for INGEST_LEADER_TTL seconds and
+# renewed every tick) lets only one of them poll at a time. Set it to 0 and
+# run `python -m ingest` to keep web workers free of ingest entirely; that
+# service serves its own /metrics on INGEST_METRICS_PORT (0 disables).
+INGEST_IN_WEB = os.environ.get('PPDV_INGEST_IN_WEB', '1') == '1'
+INGEST_LEADER_TTL = float(os.environ.get('PPDV_INGEST_LEADER_TTL', '5'))
+INGEST_METRICS_PORT = int(os.environ.get('PPDV_INGEST_METRICS_PORT', '9100'))
+
+# `python -m ingest` runs INGEST_PROCESSES shard processes. Every process on
+# every node joins one shard group and polls its hash share of PERSON_IDS;
+# a shard missing its heartbeat for INGEST_SHARD_TTL seconds is dropped and
+# its persons move to the others. Shard i serves /metrics on
+# INGEST_METRICS_PORT + i.
+INGEST_PROCESSES = int(os.environ.get('PPDV_INGEST_PROCESSES', '1'))
+INGEST_SHARD_TTL = float(os.environ.get('PPDV_INGEST_SHARD_TTL', '5'))
+
+# Redis retention. Samples are capped by count; anomalies can be capped by
+# count, by age in seconds, or both (0 disables a limit).
+REDIS_HOST = os.environ.get('PPDV_REDIS_HOST', 'localhost')
+REDIS_PORT = int(os.environ.get('PPDV_REDIS_PORT', '6379'))
+REDIS_DB = int(os.environ.get('PPDV_REDIS_DB', '0'))
+SAMPLE_RETENTION_COUNT = int(os.environ.get('PPDV_SAMPLE_RETENTION_COUNT', '610'))
+ANOMALY_RETENTION_COUNT = int(os.environ.get('PPDV_ANOMALY_RETENTION_COUNT', '10000'))
+ANOMALY_RETENTION_SECONDS = int(os.environ.get('PPDV_ANOMALY_RETENTION_SECONDS', str(24 * 3600)))
+
+# Rollup tiers kept for long chart windows, as "bucket:retention" pairs in
+# seconds: 10 s buckets for a day and 1 min buckets for eight days by default.
+ROLLUP_TIERS = tuple(
+    tuple(int(part) for part in tier.split(':'))
+    for tier in os.environ.get('PPDV_ROLLUP_TIERS', '10:86400,60:691200').split(',') if tier.strip()
+)
+
+# Upper bound on the points per trace when a chart window is downsampled.
+CHART_MAX_POINTS = int(os.environ.get('PPDV_CHART_MAX_POINTS', '1500'))
+
+# On-disk sample history (see storage.history). An empty PPDV_HISTORY_DIR
+# disables it; retention 0 keeps every partition. Ingest writes it and the
+# export route reads it, so when ingest runs as its own service both must
+# point at the same directory (a shared volume across nodes).
+HISTORY_DIR = os.environ.get('PPDV_HISTORY_DIR', 'history')
+HISTORY_PARTITION_SECONDS = int(os.environ.get('PPDV_HISTORY_PARTITION_SECONDS', '86400'))
+HISTORY_FLUSH_INTERVAL = float(os.environ.get('PPDV_HISTORY_FLUSH_INTERVAL', '10'))
+HISTORY_RETENTION_DAYS = int(os.environ.get('PPDV_HISTORY_RETENTION_DAYS', '0'))
+
+# In-process ring buffers kept by each web process, per person.
+SAMPLE_CACHE_CAPACITY = int(os.environ.get('PPDV_SAMPLE_CACHE_CAPACITY', str(SAMPLE_RETENTION_COUNT)))
+ANOMALY_CACHE_CAPACITY = int(os.environ.get('PPDV_ANOMALY_CACHE_CAPACITY', '1000'))
+
+# Number of hue bands used to color sensor cells in the tables (0 = one rule per value).
+TABLE_COLOR_BUCKETS = int(os.environ.get('PPDV_TABLE_COLOR_BUCKETS', '32'))
+
+# How long a web process trusts its in-memory copy of person metadata.
+PERSON_CACHE_TTL = int(os.environ.get('PPDV_PERSON_CACHE_TTL', '60'))
+
+# 'push' streams new samples to the chart and feet view over Server-Sent
+# Events; 'poll' keeps the per-client 1 s interval callbacks for them.
+# Every open tab holds its /stream response open, so push needs a server
+# that doesn't spend a whole worker per connection: gunicorn with
+# `-k gevent` (or at least `-k gthread --threads N`, which caps tabs at N per
+# worker). With plain sync workers use 'poll'.
+LIVE_UPDATES = os.environ.get('PPDV_LIVE_UPDATES', 'push')
+
+# Instrumentation: /metrics is always served; callbacks slower than
+# PROFILE_SLOW_CALLBACKS_MS milliseconds get their sampled stacks logged
+# (0 disables the profiler).
+PROFILE_SLOW_CALLBACKS_MS = float(os.environ.get('PPDV_PROFILE_SLOW_CALLBACKS_MS', '0'))
+
+# Memoized callback results per (view, person, newest sample). 'redis' also
+# shares them between worker processes.
+RESULT_CACHE_SIZE = int(os.environ.get('PPDV_RESULT_CACHE_SIZE', '512'))
+RESULT_CACHE_BACKEND = os.environ.get('PPDV_RESULT_CACHE_BACKEND', 'memory')
@@ -0,0 +1,104 @@
+"""Standalone ingest service.
+
+    PPDV_INGEST_IN_WEB=0 gunicorn -w 4 -k gevent 'app:create_server()'
+    python -m ingest --processes 4
+
+Polls the monitors and writes to Redis (and the history store) without
+serving the dashboard. The web processes export from that history, so
+both need the same PPDV_HISTORY_DIR. Every process, on this node and any
+other running the service, joins one shard group and polls its share of
+the persons; when a process dies the others take its persons over, and
+this node restarts it.
+"""
+import argparse
+import logging
+import multiprocessing
+import signal
+import threading
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+import config
+from ingest.service import (
+    create_history_store, create_ingest_engine, create_redis_client, create_sample_store, create_shard_membership
+)
+from instrumentation.hooks import instrument_ingest, register_metrics_endpoint
+
+logger = logging.getLogger('ingest')
+
+
+def start_metrics_server(port):
+    server = Flask(__name__)
+    register_metrics_endpoint(server)
+    http_server = make_server('0.0.0.0', port, server, threaded=True)
+    threading.Thread(target=http_server.serve_forever, name='metrics', daemon=True).start()
+    return http_server
+
+
+def setup_logging():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(processName)s %(name)s: %(message)s')
+
+
+def run_shard(index=0):
+    """Runs one shard until SIGINT/SIGTERM, with its own Redis and HTTP connection pools."""
+    setup_logging()
+    redis_client = create_redis_client()
+    sample_store = create_sample_store(redis_client)
+    history_store = create_history_store()
+    ingest_engine = create_ingest_engine(sample_store, history_store)
+    instrument_ingest(ingest_engine)
+    if config.INGEST_METRICS_PORT:
+        start_metrics_server(config.INGEST_METRICS_PORT + index)
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    logger.info("Polling up to %d persons every %.1f s", len(ingest_engine.person_ids), ingest_engine.interval)
+    try:
+        ingest_engine.run(stop_event, shard=create_shard_membership(redis_client))
+    finally:
+        ingest_engine.close()
+        if history_store is not None:
+            history_store.flush()
+
+
+def supervise(processes):
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    def start(index):
+        process = multiprocessing.Process(target=run_shard, args=(index,), name=f'ingest-{index}')
+        process.start()
+        return process
+
+    shards = [start(index) for index in range(processes)]
+    while not stop_event.wait(1.0):
+        for index, process in enumerate(shards):
+            if not process.is_alive():
+                logger.warning("Shard %s exited with %s, restarting", process.name, process.exitcode)
+                shards[index] = start(index)
+
+    for process in shards:
+        process.terminate()
+    for process in shards:
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--processes', type=int, default=config.INGEST_PROCESSES,
+                        help='shard processes to run on this node')
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.processes <= 1:
+        run_shard()
+    else:
+        supervise(args.processes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class IngestEngine:
+    """Polls every configured person concurrently on a fixed-rate schedule.
+
+    Ticks are scheduled against the monotonic clock (``start + k * interval``)
+    instead of sleeping a fixed amount after each cycle, so a slow cycle only
+    delays its own tick. When a cycle overruns by a whole interval or more the
+    missed ticks are skipped rather than fired back to back.
+
+    ``store`` is called once per tick with ``(samples, tick_time)`` where
+    ``samples`` is a list of ``(person_id, data)`` pairs for every monitor that
+    answered and ``tick_time`` is the wall-clock time the tick started.
+
+    With a ``leader`` lock (see ``ingest.leader.LeaderLock``), ``run`` only
+    polls on ticks where it holds the lock, so any number of processes can
+    run the engine and the monitors are still polled once per tick. With a
+    ``shard`` (see ``ingest.shards.ShardMembership``) every process polls
+    its own share of the persons instead. Whenever persons stop being polled
+    here (lease lost, shard rebalanced) ``on_release(person_ids)`` is called,
+    so buffered writes can be flushed before their new owner's.
+    """
+
+    def __init__(self, person_ids, base_url, store, interval=1.0, timeout=0.8, max_workers=32, on_release=None):
+        self.person_ids = list(person_ids)
+        self.base_url = base_url.rstrip('/')
+        self.store = store
+        self.on_release = on_release
+        self.interval = interval
+        self.timeout = timeout
+
+        workers = max(1, min(max_workers, len(self.person_ids)))
+        # One keep-alive pool sized to the worker count, so every worker
+        # reuses its connection instead of reconnecting on each tick.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest')
+
+        self.last_tick_lag = 0.0
+        self.max_tick_lag = 0.0
+        self.skipped_ticks = 0
+        # Wall-clock time of each person's last successful fetch.
+        self.last_success = {}
+        # Persons polled on the last tick.
+        self.polling = set()
+
+    def fetch(self, person_id):
+        started = time.perf_counter()
+        try:
+            response = self.session.get(f'{self.base_url}/v2/monitor/{person_id}', timeout=self.timeout)
+            if response.status_code == 200:
+                data = response.json()
+                self.last_success[person_id] = time.time()
+                return data
+            metrics.UPSTREAM_ERRORS.inc(f'http_{response.status_code}')
+            logger.warning("Monitor returned %s for person %s", response.status_code, person_id)
+        except requests.Timeout as e:
+            metrics.UPSTREAM_ERRORS.inc('timeout')
+            logger.warning("Timed out fetching data for person %s: %s", person_id, e)
+        except (requests.RequestException, ValueError) as e:
+            metrics.UPSTREAM_ERRORS.inc(type(e).__name__)
+            logger.warning("Error fetching data for person %s: %s", person_id, e)
+        finally:
+            metrics.UPSTREAM_DURATION.observe(time.perf_counter() - started)
+        return None
+
+    def poll_once(self, tick_time=None, person_ids=None):
+        if tick_time is None:
+            tick_time = time.time()
+        if person_ids is None:
+            person_ids = self.person_ids
+        started = time.perf_counter()
+        responses = self.executor.map(self.fetch, person_ids)
+        samples = [(person_id, data) for person_id, data in zip(person_ids, responses) if data is not None]
+        self.store(samples, tick_time)
+        metrics.INGEST_CYCLE.observe(time.perf_counter() - started)
+        return samples
+
+    def run(self, stop_event=None, leader=None, shard=None):
+        if stop_event is None:
+            stop_event = threading.Event()
+
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
+            lag = time.monotonic() - next_tick
+            self.last_tick_lag = lag
+            self.max_tick_lag = max(self.max_tick_lag, lag)
+            metrics.INGEST_TICK_LAG.set(round(lag, 6))
+            logger.debug("Ingest tick started %.1f ms late", lag * 1000)
+
+            try:
+                if shard is not None:
+                    person_ids = shard.assign(self.person_ids)
+                elif leader is None or leader.acquire():
+                    person_ids = self.person_ids
+                else:
+                    person_ids = []
+                self.release(self.polling.difference(person_ids))
+                self.polling = set(person_ids)
+                if person_ids:
+                    self.poll_once(person_ids=person_ids)
+            except Exception:
+                logger.exception("Ingest tick failed")
+
+            next_tick += self.interval
+            behind = time.monotonic() - next_tick
+            if behind >= self.interval:
+                skipped = int(behind // self.interval)
+                self.skipped_ticks += skipped
+                metrics.INGEST_SKIPPED_TICKS.inc(amount=skipped)
+                next_tick += skipped * self.interval
+                logger.warning("Ingest is %.1f s behind schedule, skipped %d tick(s)", behind, skipped)
+            stop_event.wait(max(0.0, next_tick - time.monotonic()))
+        self.release(self.polling)
+        self.polling = set()
+        if leader is not None:
+            leader.release()
+        if shard is not None:
+            shard.leave()
+
+    def release(self, person_ids):
+        if not person_ids:
+            return
+        # Persons polled elsewhere now no longer report lag from here.
+        for person_id in person_ids:
+            self.last_success.pop(person_id, None)
+        if self.on_release is not None:
+            try:
+                self.on_release(sorted(person_ids))
+            except Exception:
+                logger.exception("Releasing %d person(s) failed", len(person_ids))
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,63 @@
+import logging
+import os
+import socket
+import uuid
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Extend or release the lock only while it still holds our token.
+RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLock:
+    """Redis lease that lets exactly one of several processes do a job.
+
+    ``acquire()`` is called before every unit of work: it takes the lease if
+    nobody holds it and renews it if we do, for ``ttl`` seconds either way.
+    A leader that dies or stalls for longer than ``ttl`` loses the lease to
+    the next process that asks.
+    """
+
+    def __init__(self, redis_client, name='ingest_leader', ttl=5):
+        self.redis_client = redis_client
+        self.name = name
+        self.ttl_ms = int(ttl * 1000)
+        self.token = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        self._renew = redis_client.register_script(RENEW_SCRIPT)
+        self._release = redis_client.register_script(RELEASE_SCRIPT)
+
+    def acquire(self):
+        try:
+            leader = bool(
+                self.redis_client.set(self.name, self.token, nx=True, px=self.ttl_ms)
+                or self._renew(keys=[self.name], args=[self.token, self.ttl_ms])
+            )
+        except redis.RedisError as e:
+            logger.warning("Leader lock %s unavailable: %s", self.name, e)
+            leader = False
+        if leader != self.is_leader:
+            logger.info("%s leadership of %s", "Acquired" if leader else "Lost", self.name)
+            self.is_leader = leader
+        return leader
+
+    def release(self):
+        if self.is_leader:
+            try:
+                self._release(keys=[self.name], args=[self.token])
+            except redis.RedisError as e:
+                logger.warning("Could not release leader lock %s: %s", self.name, e)
+            self.is_leader = False
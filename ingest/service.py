@@ -0,0 +1,79 @@
+"""Construction of the shared storage and ingest pieces from ``config``.
+
+Used by both the web app factory and the standalone ingest service
+(``python -m ingest``), so the two always agree on keys and retention.
+"""
+import atexit
+
+import redis
+
+import config
+from ingest.engine import IngestEngine
+from ingest.leader import LeaderLock
+from ingest.shards import ShardMembership
+from instrumentation.hooks import instrument_redis
+from storage.history import HistoryStore
+from storage.redis_store import SampleStore
+
+
+def create_redis_client():
+    return instrument_redis(redis.StrictRedis(
+        host=config.REDIS_HOST, port=config.REDIS_PORT, db=config.REDIS_DB, decode_responses=True
+    ))
+
+
+def create_sample_store(redis_client):
+    sample_store = SampleStore(
+        redis_client,
+        sample_retention=config.SAMPLE_RETENTION_COUNT,
+        anomaly_retention_count=config.ANOMALY_RETENTION_COUNT,
+        anomaly_retention_seconds=config.ANOMALY_RETENTION_SECONDS,
+        rollup_tiers=config.ROLLUP_TIERS,
+    )
+    instrument_redis(sample_store.redis_client)
+    return sample_store
+
+
+def create_history_store():
+    if not config.HISTORY_DIR:
+        return None
+    history_store = HistoryStore(
+        config.HISTORY_DIR,
+        partition_seconds=config.HISTORY_PARTITION_SECONDS,
+        flush_interval=config.HISTORY_FLUSH_INTERVAL,
+        retention_days=config.HISTORY_RETENTION_DAYS,
+    )
+    atexit.register(history_store.flush)
+    return history_store
+
+
+def create_ingest_engine(sample_store, history_store=None):
+    def store_tick(samples, tick_time):
+        sample_store.write_tick(samples, tick_time)
+        if history_store is not None:
+            history_store.write_tick(samples, tick_time)
+
+    def release(person_ids):
+        # Another process polls these now: hand over what was buffered and
+        # forget the in-memory state it will build itself.
+        if history_store is not None:
+            history_store.flush()
+        sample_store.forget(person_ids)
+
+    return IngestEngine(
+        config.PERSON_IDS,
+        config.MONITOR_BASE_URL,
+        store_tick,
+        interval=config.POLL_INTERVAL,
+        timeout=config.REQUEST_TIMEOUT,
+        max_workers=config.INGEST_WORKERS,
+        on_release=release,
+    )
+
+
+def create_leader_lock(redis_client):
+    return LeaderLock(redis_client, 'ingest_leader', ttl=config.INGEST_LEADER_TTL)
+
+
+def create_shard_membership(redis_client):
+    return ShardMembership(redis_client, 'ingest_shards', ttl=config.INGEST_SHARD_TTL)
@@ -0,0 +1,91 @@
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+
+import redis
+
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _weight(member, person_id):
+    digest = hashlib.blake2b(f'{member}:{person_id}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def assign_persons(person_ids, members, member):
+    """The persons ``member`` owns among ``members``, by rendezvous (highest random weight) hashing.
+
+    Every person goes to the member with the highest hash of (member, person),
+    so when a member joins or leaves only the persons it wins or held move;
+    everyone else keeps theirs.
+    """
+    if not members:
+        return []
+    return [
+        person_id for person_id in person_ids
+        if max(members, key=lambda candidate: _weight(candidate, person_id)) == member
+    ]
+
+
+class ShardMembership:
+    """Splits the persons between the live ingest processes of a Redis-backed group.
+
+    ``assign()`` is called before every tick: it heartbeats into the
+    ``group`` sorted set (scored by when the heartbeat expires), drops the
+    members whose heartbeat lapsed and returns this member's share of the
+    persons. A process that dies stops heartbeating and its persons move to
+    the survivors within ``ttl`` seconds; ``leave()`` hands them over
+    straight away on a clean shutdown.
+
+    Expiry is judged on each member's own clock, so nodes need roughly
+    synchronised clocks (well within ``ttl``).
+    """
+
+    def __init__(self, redis_client, group='ingest_shards', ttl=5):
+        self.redis_client = redis_client
+        self.group = group
+        self.ttl_ms = int(ttl * 1000)
+        self.member = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.members = []
+        self._person_ids = None
+        self._assigned = []
+
+    def heartbeat(self):
+        now_ms = int(time.time() * 1000)
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(self.group, {self.member: now_ms + self.ttl_ms})
+        pipe.zremrangebyscore(self.group, '-inf', now_ms)
+        pipe.zrange(self.group, 0, -1)
+        return sorted(pipe.execute()[-1])
+
+    def assign(self, person_ids):
+        try:
+            members = self.heartbeat()
+        except redis.RedisError as e:
+            # Nothing can be stored meanwhile either; keep the last split so
+            # polling resumes where it was once Redis is back.
+            logger.warning("Shard group %s unavailable: %s", self.group, e)
+            return self._assigned
+
+        if members != self.members or person_ids is not self._person_ids:
+            self._assigned = assign_persons(person_ids, members, self.member)
+            logger.info("Shard group %s has %d member(s); %s polls %d of %d persons",
+                        self.group, len(members), self.member, len(self._assigned), len(person_ids))
+            self.members = members
+            self._person_ids = person_ids
+            metrics.INGEST_SHARD_MEMBERS.set(len(members))
+            metrics.INGEST_ASSIGNED_PERSONS.set(len(self._assigned))
+        return self._assigned
+
+    def leave(self):
+        try:
+            self.redis_client.zrem(self.group, self.member)
+        except redis.RedisError as e:
+            logger.warning("Could not leave shard group %s: %s", self.group, e)
+        self.members = []
+        self._assigned = []
@@ -0,0 +1,111 @@
+import time
+
+from flask import g, request, Response
+
+from instrumentation import metrics
+
+
+def instrument_redis(redis_client):
+    """Counts commands and times round trips on ``redis_client``, including its pipelines."""
+    if getattr(redis_client, '_instrumented', False):
+        return redis_client
+    execute_command = redis_client.execute_command
+    make_pipeline = redis_client.pipeline
+
+    def counted_execute_command(*args, **options):
+        metrics.REDIS_COMMANDS.inc(str(args[0]).upper())
+        started = time.perf_counter()
+        try:
+            return execute_command(*args, **options)
+        finally:
+            metrics.REDIS_ROUNDTRIP.observe(time.perf_counter() - started, 'command')
+
+    def counted_pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def counted_execute(*execute_args, **execute_kwargs):
+            for command_args, _ in pipe.command_stack:
+                metrics.REDIS_COMMANDS.inc(str(command_args[0]).upper())
+            started = time.perf_counter()
+            try:
+                return execute(*execute_args, **execute_kwargs)
+            finally:
+                metrics.REDIS_ROUNDTRIP.observe(time.perf_counter() - started, 'pipeline')
+
+        pipe.execute = counted_execute
+        return pipe
+
+    redis_client.execute_command = counted_execute_command
+    redis_client.pipeline = counted_pipeline
+    redis_client._instrumented = True
+    return redis_client
+
+
+def _callback_names(app):
+    names = {}
+    for output, entry in app.callback_map.items():
+        fn = entry.get('callback')
+        while hasattr(fn, '__wrapped__'):
+            fn = fn.__wrapped__
+        names[output] = getattr(fn, '__name__', output)
+    return names
+
+
+def instrument_ingest(ingest_engine):
+    metrics.INGEST_PERSON_LAG.collect = lambda: {
+        (person_id,): round(time.time() - fetched_at, 3)
+        for person_id, fetched_at in ingest_engine.last_success.items()
+    }
+
+
+def register_metrics_endpoint(server):
+    @server.route('/metrics')
+    def serve_metrics():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def register_metrics_route(server, apps, ingest_engine=None, broadcaster=None, profiler=None):
+    """Times every callback request and serves all metrics on ``/metrics``.
+
+    Callbacks are measured around the whole /_dash-update-component request,
+    so the numbers include Dash's own (de)serialisation, and labelled with
+    the name of the Python function that handled them in any of ``apps``
+    (the Dash apps sharing ``server``).
+    """
+    names = {}
+
+    @server.before_request
+    def start_callback_timer():
+        if request.path.endswith('/_dash-update-component'):
+            g.callback_started = time.perf_counter()
+            if profiler is not None:
+                profiler.begin()
+
+    @server.after_request
+    def record_callback(response):
+        started = g.pop('callback_started', None)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        if not names:
+            for app in apps:
+                names.update(_callback_names(app))
+        output = (request.get_json(silent=True) or {}).get('output')
+        label = names.get(output, 'unknown')
+        metrics.CALLBACK_DURATION.observe(duration, label)
+        metrics.CALLBACK_REQUESTS.inc(label, response.status_code)
+        if not response.is_streamed:
+            metrics.CALLBACK_RESPONSE_BYTES.observe(response.content_length or 0, label)
+        if profiler is not None:
+            profiler.end(label, duration)
+        return response
+
+    if ingest_engine is not None:
+        instrument_ingest(ingest_engine)
+    if broadcaster is not None:
+        metrics.STREAM_CLIENTS.collect = lambda: {
+            (): sum(len(queues) for queues in list(broadcaster.subscribers.values()))
+        }
+
+    register_metrics_endpoint(server)
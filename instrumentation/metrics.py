@@ -0,0 +1,140 @@
+"""A minimal in-process metrics registry rendered in the Prometheus text format.
+
+Counters, gauges and histograms are process-global and thread-safe; with
+several worker processes each exposes its own numbers, which Prometheus
+aggregates by instance.
+"""
+import bisect
+import threading
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._render_samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def _render_samples(self):
+        with self.lock:
+            values = list(self.values.items())
+        return [f'{self.name}{_format_labels(self.labels, key)} {value}' for key, value in values]
+
+
+class Gauge(_Metric):
+    """A gauge that is either set directly or read from ``collect()`` at scrape time.
+
+    ``collect`` returns ``{label_values_tuple: value}``.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), collect=None):
+        super().__init__(name, documentation, labels)
+        self.values = {}
+        self.collect = collect
+
+    def set(self, value, *label_values):
+        with self.lock:
+            self.values[label_values] = value
+
+    def _render_samples(self):
+        with self.lock:
+            values = dict(self.values)
+        if self.collect is not None:
+            values.update(self.collect())
+        return [f'{self.name}{_format_labels(self.labels, key)} {value}' for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            counts, total = self.values.get(label_values, (None, 0.0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[label_values] = (counts, total + value)
+
+    def _render_samples(self):
+        with self.lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self.values.items()]
+        lines = []
+        names = self.labels + ('le',)
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(names, key + (bound,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+def render():
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+# Dashboard callbacks, measured per /_dash-update-component request.
+CALLBACK_DURATION = Histogram('ppdv_callback_duration_seconds', 'Callback request duration.', ('callback',))
+CALLBACK_RESPONSE_BYTES = Histogram(
+    'ppdv_callback_response_bytes', 'Callback response body size.', ('callback',), buckets=BYTES_BUCKETS
+)
+CALLBACK_REQUESTS = Counter('ppdv_callback_requests_total', 'Callback requests by HTTP status.', ('callback', 'status'))
+
+# Redis, counted on the clients passed to instrument_redis.
+REDIS_COMMANDS = Counter('ppdv_redis_commands_total', 'Redis commands sent.', ('command',))
+REDIS_ROUNDTRIP = Histogram('ppdv_redis_roundtrip_seconds', 'Redis round trip duration.', ('kind',))
+
+# Ingest and the upstream monitor API.
+UPSTREAM_DURATION = Histogram('ppdv_upstream_request_seconds', 'Monitor API request duration.')
+UPSTREAM_ERRORS = Counter('ppdv_upstream_errors_total', 'Failed monitor API requests.', ('reason',))
+INGEST_CYCLE = Histogram('ppdv_ingest_cycle_seconds', 'Duration of one ingest tick (fetch and store).')
+INGEST_TICK_LAG = Gauge('ppdv_ingest_tick_lag_seconds', 'How late the last ingest tick started.')
+INGEST_SKIPPED_TICKS = Counter('ppdv_ingest_skipped_ticks_total', 'Ingest ticks skipped because ingest fell behind.')
+# Seconds since each person's last successful fetch; filled in by instrument_ingest.
+INGEST_PERSON_LAG = Gauge('ppdv_ingest_person_lag_seconds', 'Age of the newest sample fetched per person.', ('person',))
+INGEST_SHARD_MEMBERS = Gauge('ppdv_ingest_shard_members', 'Live ingest processes in the shard group.')
+INGEST_ASSIGNED_PERSONS = Gauge('ppdv_ingest_assigned_persons', 'Persons this ingest process polls.')
+
+STREAM_CLIENTS = Gauge('ppdv_stream_clients', 'Open /stream connections.')
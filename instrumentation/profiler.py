@@ -0,0 +1,71 @@
+import collections
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _collapse(frame, depth=40):
+    stack = []
+    while frame is not None and len(stack) < depth:
+        code = frame.f_code
+        stack.append(f'{code.co_filename}:{code.co_name}:{frame.f_lineno}')
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class SlowCallbackProfiler:
+    """Sampling profiler for callback requests that take longer than ``threshold`` seconds.
+
+    While requests are in flight a background thread snapshots their stacks
+    every ``interval`` seconds. When a request finishes slower than the
+    threshold its most frequent stacks are logged (in collapsed
+    ``file:function:line;...`` form, ready for a flame graph); faster
+    requests just drop their samples.
+    """
+
+    def __init__(self, threshold, interval=0.005, top=5):
+        self.threshold = threshold
+        self.interval = interval
+        self.top = top
+        self.active = {}
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name='callback-profiler', daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        while True:
+            with self.lock:
+                active = dict(self.active)
+            if active:
+                frames = sys._current_frames()
+                for thread_id, samples in active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_collapse(frame)] += 1
+                time.sleep(self.interval)
+            else:
+                # Idle until a request begins.
+                self.wake.wait()
+                self.wake.clear()
+
+    def begin(self):
+        with self.lock:
+            self.active[threading.get_ident()] = collections.Counter()
+        self.wake.set()
+
+    def end(self, label, duration):
+        with self.lock:
+            samples = self.active.pop(threading.get_ident(), None)
+        if not samples or duration < self.threshold:
+            return
+        total = sum(samples.values())
+        lines = [f'{count / total:6.1%} {stack}' for stack, count in samples.most_common(self.top)]
+        logger.warning("Slow callback %s took %.0f ms (%d samples):\n%s", label, duration * 1000, total,
+                       '\n'.join(lines))
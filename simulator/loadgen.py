@@ -0,0 +1,175 @@
+"""Load generator for a running dashboard.
+
+Starts N virtual browser sessions, each watching a random person: every
+interval a session posts the same callback request the page's interval
+timer would, carrying the stores it got back last time, and in push mode it
+also holds the person's /stream connection open. Reports callback latency
+percentiles and stream throughput at the end.
+
+    python -m simulator.loadgen --url http://localhost:8050 --sessions 200 --persons 1-500 --duration 60
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+import requests
+
+from config import parse_person_ids
+
+TICK_INPUT = 'tick-request.data'
+
+# Initial values of the states on_tick reads; stores start out empty.
+DEFAULT_STATE = {
+    'page_current': 0,
+    'page_size': 15,
+    'sort_by': [],
+    'value': None,
+}
+
+
+def find_tick_callback(dependencies):
+    for callback in dependencies:
+        if any(f"{i['id']}.{i['property']}" == TICK_INPUT for i in callback['inputs']):
+            return callback
+    raise RuntimeError(f'No callback is triggered by {TICK_INPUT}')
+
+
+def parse_outputs(output):
+    # "..a.b...c.d.." for multiple outputs, "a.b" for a single one.
+    specs = output[2:-2].split('...') if output.startswith('..') else [output]
+    return [dict(zip(('id', 'property'), spec.rsplit('.', 1))) for spec in specs]
+
+
+class Session:
+    def __init__(self, base_url, callback, person_id, chart_window, push):
+        self.base_url = base_url
+        self.callback = callback
+        self.outputs = parse_outputs(callback['output'])
+        self.http = requests.Session()
+        self.n = 0
+        self.state = {}
+        for item in callback['state']:
+            value = DEFAULT_STATE.get(item['property'])
+            if item['id'] == 'person-selector':
+                value = person_id
+            elif item['id'] == 'chart-window':
+                value = chart_window
+            elif item['id'] == 'live-config':
+                value = {'push': push}
+            self.state[(item['id'], item['property'])] = value
+        self.state[('sensor-chart-cursor', 'data')] = 0
+
+    def tick(self):
+        self.n += 1
+        payload = {
+            'output': self.callback['output'],
+            'outputs': self.outputs,
+            'inputs': [{'id': 'tick-request', 'property': 'data', 'value': self.n}],
+            'state': [
+                {'id': item['id'], 'property': item['property'], 'value': self.state[(item['id'], item['property'])]}
+                for item in self.callback['state']
+            ],
+            'changedPropIds': [TICK_INPUT],
+        }
+        response = self.http.post(f'{self.base_url}/_dash-update-component', json=payload, timeout=30)
+        if response.status_code == 204:
+            return
+        response.raise_for_status()
+        # Feed returned stores (versions, chart cursor) into the next request.
+        for component_id, props in response.json().get('response', {}).items():
+            for prop, value in props.items():
+                key = (component_id, prop.split('@')[0])
+                if key in self.state:
+                    self.state[key] = value
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+        self.events = 0
+
+    def report(self, elapsed):
+        latencies = sorted(self.latencies)
+        print(f'{len(latencies)} callbacks, {self.errors} errors in {elapsed:.1f}s '
+              f'({len(latencies) / elapsed:.1f}/s)')
+        if latencies:
+            quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            print(f'latency ms: p50 {quantiles[49] * 1000:.1f}  p95 {quantiles[94] * 1000:.1f}  '
+                  f'p99 {quantiles[98] * 1000:.1f}  max {latencies[-1] * 1000:.1f}')
+        if self.events:
+            print(f'{self.events} stream events ({self.events / elapsed:.1f}/s)')
+
+
+def run_session(session, stats, interval, stop):
+    # Spread sessions over the interval like independent browsers would be.
+    stop.wait(random.uniform(0, interval))
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            session.tick()
+            with stats.lock:
+                stats.latencies.append(time.perf_counter() - started)
+        except (requests.RequestException, ValueError):
+            with stats.lock:
+                stats.errors += 1
+        stop.wait(max(0.0, interval - (time.perf_counter() - started)))
+
+
+def run_stream(base_url, person_id, stats, stop):
+    while not stop.is_set():
+        try:
+            with requests.get(f'{base_url}/stream/{person_id}', stream=True, timeout=(5, 30)) as response:
+                for line in response.iter_lines():
+                    if stop.is_set():
+                        return
+                    if line.startswith(b'data:'):
+                        with stats.lock:
+                            stats.events += 1
+        except requests.RequestException:
+            with stats.lock:
+                stats.errors += 1
+            stop.wait(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--persons', default='1-6', help='person ids to watch, e.g. 1-500')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between ticks per session')
+    parser.add_argument('--duration', type=float, default=60.0)
+    parser.add_argument('--window', default='2m', help='chart window the sessions have selected')
+    parser.add_argument('--push', action='store_true', help='also hold a /stream connection per session')
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    callback = find_tick_callback(requests.get(f'{base_url}/_dash-dependencies', timeout=10).json())
+    person_ids = parse_person_ids(args.persons)
+
+    stats = Stats()
+    stop = threading.Event()
+    threads = []
+    for _ in range(args.sessions):
+        person_id = random.choice(person_ids)
+        session = Session(base_url, callback, person_id, args.window, args.push)
+        threads.append(threading.Thread(target=run_session, args=(session, stats, args.interval, stop), daemon=True))
+        if args.push:
+            threads.append(threading.Thread(target=run_stream, args=(base_url, person_id, stats, stop), daemon=True))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        stop.wait(args.duration)
+    except KeyboardInterrupt:
+        pass
+    stop.set()
+    stats.report(time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Stand-in for the tesla.iem.pw.edu.pl monitor API.
+
+Serves ``/v2/monitor/<id>`` in the same JSON shape as the real service for
+any number of synthetic persons, with configurable sample rate, anomaly
+injection, latency and error rate. Readings are a pure function of
+(seed, person, sample index), so two runs with the same options produce the
+same data.
+
+    python -m simulator.monitor --persons 500 --port 9080
+    PPDV_MONITOR_URL=http://localhost:9080 PPDV_PERSON_IDS=1-500 python app.py
+"""
+import argparse
+import random
+import time
+
+from flask import Flask, jsonify
+
+from storage.codec import SENSOR_NAMES
+
+FIRST_NAMES = ('Anna', 'Piotr', 'Maria', 'Jan', 'Katarzyna', 'Andrzej', 'Agnieszka', 'Tomasz', 'Ewa', 'Marek')
+LAST_NAMES = ('Nowak', 'Kowalski', 'Wisniewski', 'Wojcik', 'Kowalczyk', 'Kaminski', 'Lewandowski', 'Zielinski')
+MAX_VALUE = 1100
+
+
+class MonitorSimulator:
+    """Generates monitor responses.
+
+    Every ``1 / rate`` seconds each person gets a new reading. Each sensor
+    hovers around a per-person baseline; with probability ``anomaly_rate``
+    per sample and sensor an anomaly starts and lasts ``anomaly_length``
+    samples, during which the sensor reads near the top of the scale.
+    """
+
+    def __init__(self, persons=6, rate=1.0, anomaly_rate=0.01, anomaly_length=3, seed=0):
+        self.persons = persons
+        self.rate = rate
+        self.anomaly_rate = anomaly_rate
+        self.anomaly_length = anomaly_length
+        self.seed = seed
+        self._persons = {}
+
+    def _random(self, *key):
+        # String seeds are hashed with SHA-512, so unlike hash() they are
+        # stable across processes.
+        return random.Random(':'.join(map(str, (self.seed,) + key)))
+
+    def person(self, person_id):
+        if person_id not in self._persons:
+            self._persons[person_id] = self._make_person(person_id)
+        return self._persons[person_id]
+
+    def _make_person(self, person_id):
+        rng = self._random('person', person_id)
+        return {
+            'firstname': rng.choice(FIRST_NAMES),
+            'lastname': rng.choice(LAST_NAMES),
+            'birthdate': f'{rng.randint(1940, 2005)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            'disabled': rng.random() < 0.2,
+            'baselines': [rng.randint(50, 600) for _ in SENSOR_NAMES],
+        }
+
+    def is_anomaly(self, person_id, sensor, index):
+        return any(
+            self._random('anomaly', person_id, sensor, start).random() < self.anomaly_rate
+            for start in range(index - self.anomaly_length + 1, index + 1)
+        )
+
+    def reading(self, person_id, now=None):
+        index = int((time.time() if now is None else now) * self.rate)
+        person = self.person(person_id)
+        rng = self._random('reading', person_id, index)
+        sensors = []
+        for i, name in enumerate(SENSOR_NAMES):
+            anomaly = self.is_anomaly(person_id, i, index)
+            if anomaly:
+                value = rng.randint(int(MAX_VALUE * 0.85), MAX_VALUE)
+            else:
+                value = min(max(int(rng.gauss(person['baselines'][i], 60)), 0), MAX_VALUE)
+            sensors.append({'id': i, 'name': name, 'value': value, 'anomaly': anomaly})
+        return {
+            'firstname': person['firstname'],
+            'lastname': person['lastname'],
+            'birthdate': person['birthdate'],
+            'disabled': person['disabled'],
+            'trace': {'id': index, 'name': f'trace_{person_id}', 'sensors': sensors},
+        }
+
+
+def create_app(simulator, latency=0.0, jitter=0.0, error_rate=0.0):
+    app = Flask(__name__)
+
+    @app.route('/v2/monitor/<int:person_id>')
+    def monitor(person_id):
+        if latency or jitter:
+            time.sleep(max(0.0, random.gauss(latency, jitter)))
+        if random.random() < error_rate:
+            return jsonify(error='simulated failure'), 503
+        if not 1 <= person_id <= simulator.persons:
+            return jsonify(error='unknown person'), 404
+        return jsonify(simulator.reading(person_id))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9080)
+    parser.add_argument('--persons', type=int, default=6, help='person ids 1..N are served')
+    parser.add_argument('--rate', type=float, default=1.0, help='new readings per second')
+    parser.add_argument('--anomaly-rate', type=float, default=0.01, help='chance an anomaly starts, per sample and sensor')
+    parser.add_argument('--anomaly-length', type=int, default=3, help='samples an anomaly lasts')
+    parser.add_argument('--latency', type=float, default=0.0, help='mean response delay in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='standard deviation of the delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    simulator = MonitorSimulator(args.persons, args.rate, args.anomaly_rate, args.anomaly_length, args.seed)
+    app = create_app(simulator, args.latency, args.jitter, args.error_rate)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+
+import numpy as np
+import redis
+
+from storage.codec import decode_feed, SAMPLE_DTYPE
+from storage.redis_store import anomalies_key, FEED_CHANNEL, samples_key, to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+SOURCE_KEYS = {
+    'samples': samples_key,
+    'anomalies': anomalies_key,
+}
+
+
+class RingBuffer:
+    """Fixed-capacity, append-only buffer of SAMPLE_DTYPE records.
+
+    Every record is written twice, at ``i`` and ``i + size``, so the newest
+    ``capacity`` records are always contiguous and can be handed out as a
+    NumPy view without copying. ``size`` is ``capacity + slack``: a view
+    handed out now stays intact for at least ``slack`` further appends, which
+    is far longer than any callback holds on to it. Copy a view if you need
+    to keep it.
+    """
+
+    def __init__(self, capacity, slack=None):
+        self.capacity = capacity
+        self.size = capacity + (slack if slack is not None else max(16, capacity // 4))
+        self.data = np.zeros(2 * self.size, dtype=SAMPLE_DTYPE)
+        self.count = 0
+
+    def _end(self):
+        return self.count % self.size + self.size
+
+    @property
+    def last_ts(self):
+        return int(self.data[self._end() - 1]['ts']) if self.count else None
+
+    def extend(self, samples):
+        # Feed messages and catch-up reads can overlap; keep ts strictly increasing.
+        if self.count:
+            samples = samples[samples['ts'] > self.last_ts]
+        samples = samples[-self.size:]
+        if not len(samples):
+            return
+        positions = (self.count + np.arange(len(samples))) % self.size
+        self.data[positions] = samples
+        self.data[positions + self.size] = samples
+        self.count += len(samples)
+
+    def view(self, start_ts=None):
+        n = min(self.count, self.capacity)
+        end = self._end()
+        window = self.data[end - n:end]
+        if start_ts is not None:
+            window = window[np.searchsorted(window['ts'], start_ts):]
+        return window
+
+
+class SampleCache:
+    """Per-person ring buffers of recent samples and anomalies, shared by all callbacks.
+
+    A background thread subscribes to the ingest feed and appends every new
+    sample, so reads are a memory slice instead of a Redis round trip. A
+    person's buffers are backfilled from Redis on first use and reloaded
+    whenever the subscription is re-established. While the feed is down each
+    read catches up with a single incremental range query instead, so Redis
+    stays the source of truth throughout.
+    """
+
+    def __init__(self, sample_store, capacity=610, anomaly_capacity=1000):
+        self.sample_store = sample_store
+        self.capacities = {'samples': capacity, 'anomalies': anomaly_capacity}
+        self.buffers = {}
+        # Newest feed sample of every person, buffered or not.
+        self.newest = {}
+        self.lock = threading.Lock()
+        self.live = False
+        self.listeners = []
+
+    def add_listener(self, listener):
+        """Calls ``listener(entries)`` with every decoded feed message."""
+        self.listeners.append(listener)
+
+    def start(self):
+        thread = threading.Thread(target=self._listen, name='sample-cache', daemon=True)
+        thread.start()
+        return thread
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.sample_store.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(FEED_CHANNEL)
+                # Buffers filled before the subscription may have a gap; reload them.
+                with self.lock:
+                    self.buffers.clear()
+                    self.newest.clear()
+                self.live = True
+                for message in pubsub.listen():
+                    entries = decode_feed(message['data'])
+                    self._apply(entries)
+                    for listener in self.listeners:
+                        listener(entries)
+            except redis.RedisError as e:
+                logger.warning("Sample feed subscription lost: %s", e)
+            self.live = False
+            time.sleep(1)
+
+    def _apply(self, entries):
+        with self.lock:
+            for i, person_id in enumerate(entries['person_id'].tolist()):
+                sample = entries['sample'][i:i + 1]
+                self.newest[person_id] = sample[0]
+                buffer = self.buffers.get(('samples', person_id))
+                if buffer is not None:
+                    buffer.extend(sample)
+                buffer = self.buffers.get(('anomalies', person_id))
+                if buffer is not None and sample['anomaly'][0]:
+                    buffer.extend(sample)
+
+    def _load(self, kind, person_id):
+        capacity = self.capacities[kind]
+        # Register an empty buffer first so feed messages that arrive during
+        # the backfill are collected rather than lost, then merge the two.
+        pending = RingBuffer(capacity)
+        with self.lock:
+            self.buffers[(kind, person_id)] = pending
+        history = self.sample_store.read_tail(SOURCE_KEYS[kind](person_id), capacity)
+        buffer = RingBuffer(capacity)
+        buffer.extend(history)
+        with self.lock:
+            buffer.extend(pending.view())
+            self.buffers[(kind, person_id)] = buffer
+        return buffer
+
+    def _buffer(self, kind, person_id):
+        buffer = self.buffers.get((kind, person_id))
+        if buffer is None:
+            return self._load(kind, person_id)
+        if not self.live:
+            key = SOURCE_KEYS[kind](person_id)
+            if buffer.count:
+                newer = self.sample_store.read_after(key, buffer.last_ts)
+            else:
+                newer = self.sample_store.read_tail(key, buffer.capacity)
+            with self.lock:
+                buffer.extend(newer)
+        return buffer
+
+    def samples(self, person_id, start_time=None):
+        start_ts = None if start_time is None else to_epoch_ms(start_time)
+        return self._buffer('samples', person_id).view(start_ts)
+
+    def anomalies(self, person_id, start_time=None):
+        start_ts = None if start_time is None else to_epoch_ms(start_time)
+        return self._buffer('anomalies', person_id).view(start_ts)
+
+    def version(self, person_id, kind='samples'):
+        """Epoch ms of the newest cached sample (or anomaly), 0 if there is none."""
+        return self._buffer(kind, person_id).last_ts or 0
+
+    def latest(self, person_id):
+        samples = self._buffer('samples', person_id).view()
+        return samples[-1] if len(samples) else None
+
+    def latest_many(self, person_ids):
+        """The newest sample of each person as a SAMPLE_DTYPE array aligned with ``person_ids``.
+
+        Served from the feed without creating per-person buffers, so one call
+        covers a whole ward; persons the feed hasn't mentioned yet are read
+        from Redis in one pipeline. ts is 0 for persons with no samples.
+        """
+        latest = np.zeros(len(person_ids), dtype=SAMPLE_DTYPE)
+        missing = []
+        for i, person_id in enumerate(person_ids):
+            sample = self.newest.get(person_id) if self.live else None
+            if sample is None:
+                missing.append(i)
+            else:
+                latest[i] = sample
+        if missing:
+            stored = self.sample_store.read_latest_many([person_ids[i] for i in missing])
+            latest[missing] = stored
+            if self.live:
+                with self.lock:
+                    for i, sample in zip(missing, stored):
+                        if sample['ts']:
+                            self.newest.setdefault(person_ids[i], sample)
+        return latest
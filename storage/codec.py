@@ -0,0 +1,103 @@
+import struct
+
+import numpy as np
+
+SENSOR_NAMES = ('L0', 'L1', 'L2', 'R0', 'R1', 'R2')
+SENSOR_INDEX = {name: i for i, name in enumerate(SENSOR_NAMES)}
+MAX_RAW_VALUE = 0xFFFF
+
+# One packed sample: epoch ms, six sensor values in SENSOR_NAMES order and a
+# bitmask with bit i set when sensor i was flagged as an anomaly. 21 bytes,
+# versus ~1 KB for the JSON monitor response it replaces.
+SAMPLE_STRUCT = struct.Struct('<q6HB')
+SAMPLE_DTYPE = np.dtype([('ts', '<i8'), ('values', '<u2', (len(SENSOR_NAMES),)), ('anomaly', 'u1')])
+assert SAMPLE_DTYPE.itemsize == SAMPLE_STRUCT.size
+
+EMPTY_SAMPLES = np.empty(0, dtype=SAMPLE_DTYPE)
+
+# One anomaly episode: a run of consecutive anomalous samples. Start and end
+# epoch ms, the OR of the samples' anomaly bitmasks, the highest value each
+# sensor reached during the run and the number of samples in it.
+EPISODE_STRUCT = struct.Struct('<qqB6HI')
+EPISODE_DTYPE = np.dtype([
+    ('start', '<i8'), ('end', '<i8'), ('sensors', 'u1'),
+    ('peaks', '<u2', (len(SENSOR_NAMES),)), ('count', '<u4'),
+])
+assert EPISODE_DTYPE.itemsize == EPISODE_STRUCT.size
+
+# One rollup bucket: its start in epoch ms, the number of samples in it and,
+# per sensor, the minimum, sum and maximum of their values (the mean is
+# sum / count), plus how many of the samples were anomalous. Sums are kept
+# instead of means so a bucket can be extended exactly as samples arrive.
+ROLLUP_STRUCT = struct.Struct('<qI6H6I6HH')
+ROLLUP_DTYPE = np.dtype([
+    ('ts', '<i8'), ('count', '<u4'),
+    ('min', '<u2', (len(SENSOR_NAMES),)), ('sum', '<u4', (len(SENSOR_NAMES),)),
+    ('max', '<u2', (len(SENSOR_NAMES),)), ('anomalies', '<u2'),
+])
+assert ROLLUP_DTYPE.itemsize == ROLLUP_STRUCT.size
+
+# Live feed entry published once per ingest tick: every person's new sample
+# prefixed with its person id.
+FEED_STRUCT = struct.Struct('<I')
+FEED_DTYPE = np.dtype([('person_id', '<u4'), ('sample', SAMPLE_DTYPE)])
+
+
+def encode_sample(ts, data):
+    values = [0] * len(SENSOR_NAMES)
+    anomaly = 0
+    for sensor in data['trace']['sensors']:
+        i = SENSOR_INDEX.get(sensor['name'])
+        if i is None:
+            continue
+        values[i] = min(max(int(sensor['value']), 0), MAX_RAW_VALUE)
+        if sensor.get('anomaly', False):
+            anomaly |= 1 << i
+    return SAMPLE_STRUCT.pack(ts, *values, anomaly)
+
+
+def decode_samples(blobs):
+    """Unpacks a sequence of packed samples into one SAMPLE_DTYPE array."""
+    if not blobs:
+        return EMPTY_SAMPLES
+    return np.frombuffer(b''.join(blobs), dtype=SAMPLE_DTYPE)
+
+
+def encode_episode(start, end, sensors, peaks, count):
+    return EPISODE_STRUCT.pack(start, end, sensors, *peaks, count)
+
+
+def decode_episodes(blobs):
+    if not blobs:
+        return np.empty(0, dtype=EPISODE_DTYPE)
+    return np.frombuffer(b''.join(blobs), dtype=EPISODE_DTYPE)
+
+
+def encode_rollup(ts, count, minimum, total, maximum, anomalies):
+    return ROLLUP_STRUCT.pack(ts, count, *minimum, *total, *maximum, anomalies)
+
+
+def decode_rollups(blobs):
+    if not blobs:
+        return np.empty(0, dtype=ROLLUP_DTYPE)
+    return np.frombuffer(b''.join(blobs), dtype=ROLLUP_DTYPE)
+
+
+def encode_feed(entries):
+    """Packs ``(person_id, packed_sample)`` pairs into one feed message."""
+    return b''.join(FEED_STRUCT.pack(person_id) + record for person_id, record in entries)
+
+
+def decode_feed(payload):
+    return np.frombuffer(payload, dtype=FEED_DTYPE)
+
+
+def extract_metadata(data):
+    # Everything in a monitor response that isn't a per-tick reading.
+    return {
+        'firstname': data.get('firstname'),
+        'lastname': data.get('lastname'),
+        'birthdate': data.get('birthdate'),
+        'disabled': data.get('disabled', False),
+        'sensors': [{'id': sensor['id'], 'name': sensor['name']} for sensor in data['trace']['sensors']],
+    }
@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from storage.codec import EMPTY_SAMPLES, encode_sample, SAMPLE_DTYPE
+from storage.redis_store import to_epoch_ms
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryStore:
+    """Durable, append-only sample history on local disk.
+
+    Redis only keeps the last few minutes; everything ingest sees is also
+    appended here. Each person has a directory of time partitions of
+    ``partition_seconds`` (a UTC day by default), and each partition is a
+    flat file of packed SAMPLE_DTYPE records in time order, named after the
+    partition's start in epoch ms. Writes are buffered in memory and flushed
+    in one append per partition every ``flush_interval`` seconds, so ingest
+    never waits on the disk more than once per interval. Records at or
+    before a partition's last timestamp are dropped on append, so a previous
+    writer flushing late (after an ingest handover) can't break the order.
+
+    Range queries memory-map only the partitions that overlap the range and
+    slice them with a binary search, so the returned arrays are views of the
+    page cache rather than copies. Partitions older than ``retention_days``
+    are deleted on flush (0 keeps everything).
+    """
+
+    def __init__(self, root, partition_seconds=86400, flush_interval=10, retention_days=0):
+        self.root = root
+        self.partition_ms = partition_seconds * 1000
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._checked = set()
+
+    def _person_dir(self, person_id):
+        return os.path.join(self.root, f'person_{person_id}')
+
+    def _partition_path(self, person_id, partition):
+        return os.path.join(self._person_dir(person_id), f'{partition}.bin')
+
+    def partitions(self, person_id):
+        """Start times (epoch ms) of the person's partitions, oldest first."""
+        try:
+            names = os.listdir(self._person_dir(person_id))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-4]) for name in names if name.endswith('.bin'))
+
+    def is_empty(self):
+        """True if nothing was ever flushed under ``root`` and nothing is buffered here."""
+        if self.pending:
+            return False
+        try:
+            return not any(name.startswith('person_') for name in os.listdir(self.root))
+        except FileNotFoundError:
+            return True
+
+    def write_tick(self, samples, tick_time):
+        """Same signature as SampleStore.write_tick, so both can be fed by the ingest engine."""
+        ts = to_epoch_ms(tick_time)
+        with self.lock:
+            for person_id, data in samples:
+                self.pending.setdefault(person_id, []).append(encode_sample(ts, data))
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+                self._last_flush = time.monotonic()
+            for person_id, records in pending.items():
+                samples = np.frombuffer(b''.join(records), dtype=SAMPLE_DTYPE)
+                partitions = samples['ts'] - samples['ts'] % self.partition_ms
+                bounds = np.flatnonzero(np.diff(partitions)) + 1
+                for chunk in np.split(samples, bounds):
+                    self._append(person_id, int(chunk['ts'][0] - chunk['ts'][0] % self.partition_ms), chunk)
+            if self.retention_days:
+                self._expire(time.time() * 1000 - self.retention_days * 86400 * 1000)
+
+    def _append(self, person_id, partition, samples):
+        path = self._partition_path(person_id, partition)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            if path not in self._checked:
+                # A crash mid-write can leave a torn record at the end; cut it
+                # off so later appends stay aligned.
+                if size % SAMPLE_DTYPE.itemsize:
+                    size -= size % SAMPLE_DTYPE.itemsize
+                    f.truncate(size)
+                self._checked.add(path)
+            end = size - size % SAMPLE_DTYPE.itemsize
+            if end:
+                f.seek(end - SAMPLE_DTYPE.itemsize)
+                last_ts = np.frombuffer(f.read(SAMPLE_DTYPE.itemsize), dtype=SAMPLE_DTYPE)['ts'][0]
+                samples = samples[samples['ts'] > last_ts]
+            if len(samples):
+                f.write(samples.tobytes())
+
+    def _expire(self, cutoff):
+        try:
+            person_dirs = os.listdir(self.root)
+        except FileNotFoundError:
+            return
+        for person_dir in person_dirs:
+            if not person_dir.startswith('person_'):
+                continue
+            person_id = person_dir[len('person_'):]
+            for partition in self.partitions(person_id):
+                if partition + self.partition_ms > cutoff:
+                    break
+                path = self._partition_path(person_id, partition)
+                logger.info("Removing expired history partition %s", path)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Another ingest shard expired it first.
+                    pass
+                self._checked.discard(path)
+
+    def _map(self, person_id, partition):
+        path = self._partition_path(person_id, partition)
+        count = os.path.getsize(path) // SAMPLE_DTYPE.itemsize
+        if not count:
+            return EMPTY_SAMPLES
+        return np.memmap(path, dtype=SAMPLE_DTYPE, mode='r', shape=(count,))
+
+    def iter_range(self, person_id, start_time=None, end_time=None):
+        """Yields read-only SAMPLE_DTYPE views, one per partition, covering start_time <= ts <= end_time."""
+        start = None if start_time is None else to_epoch_ms(start_time)
+        end = None if end_time is None else to_epoch_ms(end_time)
+        for partition in self.partitions(person_id):
+            if start is not None and partition + self.partition_ms <= start:
+                continue
+            if end is not None and partition > end:
+                break
+            samples = self._map(person_id, partition)
+            lo = 0 if start is None else np.searchsorted(samples['ts'], start, side='left')
+            hi = len(samples) if end is None else np.searchsorted(samples['ts'], end, side='right')
+            if hi > lo:
+                yield samples[lo:hi]
+
+    def read_range(self, person_id, start_time=None, end_time=None):
+        """Like iter_range, joined into one array (a copy only when the range spans partitions)."""
+        chunks = list(self.iter_range(person_id, start_time, end_time))
+        if not chunks:
+            return EMPTY_SAMPLES
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from storage.codec import extract_metadata
+
+logger = logging.getLogger(__name__)
+
+
+class PersonDirectory:
+    """Cached person metadata for the patient dropdown and details panel.
+
+    Ingest keeps ``person_{id}_meta`` in Redis up to date for every polled
+    person, so lookups normally never leave Redis, and repeated lookups
+    within ``ttl`` seconds never leave the process. Persons Redis knows
+    nothing about are fetched from the monitor by a few background workers;
+    callers get ``None`` meanwhile instead of blocking on the request.
+    """
+
+    def __init__(self, sample_store, person_ids, base_url, ttl=60, timeout=2.0, max_workers=4):
+        self.sample_store = sample_store
+        self.person_ids = list(person_ids)
+        self.base_url = base_url.rstrip('/')
+        self.ttl = ttl
+        self.timeout = timeout
+        # The workers share one keep-alive pool of their own size.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='person-details')
+        self._cache = {}
+        self._fetching = set()
+        self._lock = threading.Lock()
+
+    def _fresh(self, person_id, now):
+        entry = self._cache.get(person_id)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        return None
+
+    def get_many(self, person_ids, fetch=True):
+        now = time.monotonic()
+        found = {}
+        missing = []
+        for person_id in person_ids:
+            metadata = self._fresh(person_id, now)
+            if metadata is None:
+                missing.append(person_id)
+            else:
+                found[person_id] = metadata
+
+        if missing:
+            stored = self.sample_store.read_metadata_many(missing)
+            for person_id, metadata in stored.items():
+                self._cache[person_id] = (now + self.ttl, metadata)
+            found.update(stored)
+            if fetch:
+                for person_id in missing:
+                    if person_id not in stored:
+                        self._fetch_in_background(person_id)
+        return found
+
+    def get(self, person_id):
+        return self.get_many([person_id]).get(person_id)
+
+    def is_fetching(self, person_id):
+        return person_id in self._fetching
+
+    def options(self):
+        # Labels come from what ingest has stored; the rest read "Person N"
+        # rather than queueing a fetch for the whole fleet.
+        found = self.get_many(self.person_ids, fetch=False)
+        options = []
+        for person_id in self.person_ids:
+            metadata = found.get(person_id)
+            if metadata is not None:
+                label = f"{metadata['firstname']} {metadata['lastname']}"
+            else:
+                label = f"Person {person_id}"
+            options.append({'label': label, 'value': person_id})
+        return options
+
+    def _fetch_in_background(self, person_id):
+        with self._lock:
+            if person_id in self._fetching:
+                return
+            self._fetching.add(person_id)
+        self.executor.submit(self._fetch, person_id)
+
+    def _fetch(self, person_id):
+        try:
+            response = self.session.get(f'{self.base_url}/v2/monitor/{person_id}', timeout=self.timeout)
+            if response.status_code == 200:
+                metadata = extract_metadata(response.json())
+                # Let it expire unless ingest (which keeps it current without a
+                # TTL) has written it meanwhile, in which case leave that alone.
+                self.sample_store.write_metadata(person_id, metadata, ttl=self.ttl, overwrite=False)
+                self._cache[person_id] = (time.monotonic() + self.ttl, metadata)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.warning("Error fetching details for person %s: %s", person_id, e)
+        finally:
+            with self._lock:
+                self._fetching.discard(person_id)
@@ -0,0 +1,281 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import redis
+
+from storage.codec import (
+    decode_episodes, decode_rollups, decode_samples, encode_episode, encode_feed, encode_rollup, encode_sample,
+    extract_metadata, SAMPLE_DTYPE, SAMPLE_STRUCT
+)
+
+# Every tick's new samples are also published here for in-process caches.
+FEED_CHANNEL = 'samples_feed'
+
+
+def samples_key(person_id):
+    return f'person_{person_id}_samples'
+
+
+def anomalies_key(person_id):
+    return f'person_{person_id}_anomaly_samples'
+
+
+def episodes_key(person_id):
+    return f'person_{person_id}_episodes'
+
+
+def rollup_key(person_id, seconds):
+    return f'person_{person_id}_rollup_{seconds}s'
+
+
+def version_key(person_id):
+    return f'person_{person_id}_version'
+
+
+def metadata_key(person_id):
+    return f'person_{person_id}_meta'
+
+
+def has_anomaly(data):
+    return any(sensor.get('anomaly', False) for sensor in data['trace']['sensors'])
+
+
+def to_epoch_ms(value):
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value * 1000)
+
+
+def binary_client(redis_client):
+    """A client with ``redis_client``'s connection settings that returns raw bytes."""
+    pool = redis_client.connection_pool
+    if not pool.connection_kwargs.get('decode_responses'):
+        return redis_client
+    kwargs = dict(pool.connection_kwargs, decode_responses=False)
+    return redis.Redis(connection_pool=redis.ConnectionPool(connection_class=pool.connection_class, **kwargs))
+
+
+class SampleStore:
+    """Time-indexed storage of ingested monitor samples in Redis.
+
+    Samples and anomalous samples live in per-person sorted sets scored by
+    epoch milliseconds, so window queries are answered server-side with
+    ZRANGEBYSCORE and cost O(window) rather than O(retained history). Members
+    are packed with ``storage.codec`` and readers get ``SAMPLE_DTYPE`` arrays;
+    the person metadata that used to be repeated in every record is kept once
+    per person under ``person_{id}_meta`` and only rewritten when it changes.
+
+    Consecutive anomalous samples are also merged into episodes (see
+    ``storage.codec.EPISODE_STRUCT``) kept in ``person_{id}_episodes``,
+    scored by their end time so a window query also finds episodes that
+    started before the window. An episode is closed by the first normal
+    sample or by a gap of more than ``episode_gap`` seconds.
+
+    For windows longer than the raw samples cover, every sample is also
+    folded into one bucket per rollup tier (see ``storage.codec.ROLLUP_STRUCT``).
+    ``rollup_tiers`` is a sequence of ``(bucket_seconds, retention_seconds)``
+    pairs; each tier lives in ``person_{id}_rollup_{n}s`` scored by bucket
+    start, and the open bucket is rewritten in place on every tick.
+
+    All writes of one ingest tick, for every person, go out as a single
+    pipelined transaction, together with one ``FEED_CHANNEL`` message carrying
+    the tick's samples. Each person also has a ``person_{id}_version`` hash
+    whose ``samples`` and ``anomalies`` counters are bumped on every write,
+    so readers can tell cheaply whether anything changed.
+
+    Samples are capped at ``sample_retention``; anomalies and episodes are
+    bounded by ``anomaly_retention_count`` and/or
+    ``anomaly_retention_seconds`` (0 disables a limit).
+    """
+
+    def __init__(self, redis_client, sample_retention=610, anomaly_retention_count=0, anomaly_retention_seconds=0,
+                 episode_gap=5, rollup_tiers=()):
+        self.redis_client = binary_client(redis_client)
+        self.sample_retention = sample_retention
+        self.anomaly_retention_count = anomaly_retention_count
+        self.anomaly_retention_seconds = anomaly_retention_seconds
+        self.episode_gap = episode_gap
+        self._written_metadata = {}
+        self._open_episodes = {}
+        self.rollup_tiers = tuple(rollup_tiers)
+        self._open_buckets = {}
+
+    def _update_episode(self, pipe, person_id, ts, record):
+        _, *values, anomaly = SAMPLE_STRUCT.unpack(record)
+        episode = self._open_episodes.get(person_id)
+        if episode is not None and ts - episode['end'] > self.episode_gap * 1000:
+            episode = None
+
+        if episode is None:
+            episode = {'start': ts, 'end': ts, 'sensors': anomaly, 'peaks': values, 'count': 1, 'member': None}
+        else:
+            # The member encodes the end time, so growing it means replacing it.
+            pipe.zrem(episodes_key(person_id), episode['member'])
+            episode['end'] = ts
+            episode['sensors'] |= anomaly
+            episode['peaks'] = [max(peak, value) for peak, value in zip(episode['peaks'], values)]
+            episode['count'] += 1
+
+        episode['member'] = encode_episode(
+            episode['start'], episode['end'], episode['sensors'], episode['peaks'], episode['count']
+        )
+        pipe.zadd(episodes_key(person_id), {episode['member']: ts})
+        self._open_episodes[person_id] = episode
+
+    def forget(self, person_ids):
+        """Drops the open episodes and rollup buckets of persons another process now writes."""
+        person_ids = set(person_ids)
+        for person_id in person_ids:
+            self._open_episodes.pop(person_id, None)
+            self._written_metadata.pop(person_id, None)
+        for bucket_key in [k for k in self._open_buckets if k[0] in person_ids]:
+            del self._open_buckets[bucket_key]
+
+    def _load_bucket(self, key, start):
+        stored = decode_rollups(self.redis_client.zrangebyscore(key, start, start))
+        if not len(stored):
+            return None
+        bucket = stored[-1]
+        return {'ts': start, 'count': int(bucket['count']), 'min': bucket['min'].tolist(),
+                'sum': bucket['sum'].tolist(), 'max': bucket['max'].tolist(), 'anomalies': int(bucket['anomalies'])}
+
+    def _update_rollups(self, pipe, person_id, ts, record):
+        _, *values, anomaly = SAMPLE_STRUCT.unpack(record)
+        for seconds, retention in self.rollup_tiers:
+            key = rollup_key(person_id, seconds)
+            start = ts - ts % (seconds * 1000)
+            bucket = self._open_buckets.get((person_id, seconds))
+            if bucket is None:
+                # First sample for this person since a restart or handover:
+                # carry on with the bucket a previous writer left, if any.
+                bucket = self._load_bucket(key, start)
+                if bucket is not None:
+                    self._open_buckets[(person_id, seconds)] = bucket
+            if bucket is None or bucket['ts'] != start:
+                bucket = {'ts': start, 'count': 0, 'min': values, 'sum': [0] * len(values), 'max': values,
+                          'anomalies': 0}
+                self._open_buckets[(person_id, seconds)] = bucket
+                # Old buckets only need trimming when a new one opens.
+                pipe.zremrangebyscore(key, '-inf', f'({start - retention * 1000}')
+            bucket['count'] += 1
+            bucket['min'] = [min(a, b) for a, b in zip(bucket['min'], values)]
+            bucket['sum'] = [a + b for a, b in zip(bucket['sum'], values)]
+            bucket['max'] = [max(a, b) for a, b in zip(bucket['max'], values)]
+            bucket['anomalies'] += bool(anomaly)
+            pipe.zremrangebyscore(key, start, start)
+            member = encode_rollup(start, bucket['count'], bucket['min'], bucket['sum'], bucket['max'],
+                                   bucket['anomalies'])
+            pipe.zadd(key, {member: start})
+
+    def write_tick(self, samples, tick_time):
+        if not samples:
+            return
+        ts = to_epoch_ms(tick_time)
+
+        pipe = self.redis_client.pipeline(transaction=True)
+        feed = []
+        for person_id, data in samples:
+            record = encode_sample(ts, data)
+            feed.append((person_id, record))
+            pipe.zadd(samples_key(person_id), {record: ts})
+            pipe.zremrangebyrank(samples_key(person_id), 0, -self.sample_retention - 1)
+            pipe.hincrby(version_key(person_id), 'samples', 1)
+            self._update_rollups(pipe, person_id, ts, record)
+
+            if has_anomaly(data):
+                pipe.zadd(anomalies_key(person_id), {record: ts})
+                self._update_episode(pipe, person_id, ts, record)
+                pipe.hincrby(version_key(person_id), 'anomalies', 1)
+                if self.anomaly_retention_count:
+                    pipe.zremrangebyrank(anomalies_key(person_id), 0, -self.anomaly_retention_count - 1)
+                    pipe.zremrangebyrank(episodes_key(person_id), 0, -self.anomaly_retention_count - 1)
+            else:
+                self._open_episodes.pop(person_id, None)
+            if self.anomaly_retention_seconds:
+                cutoff = ts - self.anomaly_retention_seconds * 1000
+                pipe.zremrangebyscore(anomalies_key(person_id), '-inf', f'({cutoff}')
+                pipe.zremrangebyscore(episodes_key(person_id), '-inf', f'({cutoff}')
+
+            metadata = extract_metadata(data)
+            if self._written_metadata.get(person_id) != metadata:
+                pipe.set(metadata_key(person_id), json.dumps(metadata))
+                self._written_metadata[person_id] = metadata
+        pipe.publish(FEED_CHANNEL, encode_feed(feed))
+        pipe.execute()
+
+    def read_range(self, key, start_time=None, end_time=None):
+        start = '-inf' if start_time is None else to_epoch_ms(start_time)
+        end = '+inf' if end_time is None else to_epoch_ms(end_time)
+        return decode_samples(self.redis_client.zrangebyscore(key, start, end))
+
+    def read_tail(self, key, count):
+        return decode_samples(self.redis_client.zrange(key, -count, -1))
+
+    def read_after(self, key, ts):
+        """Samples stored under ``key`` strictly newer than epoch ms ``ts``."""
+        return decode_samples(self.redis_client.zrangebyscore(key, f'({ts}', '+inf'))
+
+    def read_page(self, key, offset, count, newest_first=True):
+        """One page of ``key`` by rank, plus the total number of samples stored.
+
+        The page comes back in the requested order (newest first by default).
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.zcard(key)
+        if newest_first:
+            pipe.zrevrange(key, offset, offset + count - 1)
+        else:
+            pipe.zrange(key, offset, offset + count - 1)
+        total, records = pipe.execute()
+        return total, decode_samples(records)
+
+    def read_samples(self, person_id, start_time=None, end_time=None):
+        """Samples with start_time <= ts <= end_time as a SAMPLE_DTYPE array, oldest first.
+
+        Bounds are datetimes or epoch seconds; ``None`` leaves a side open.
+        """
+        return self.read_range(samples_key(person_id), start_time, end_time)
+
+    def read_anomalies(self, person_id, start_time=None, end_time=None):
+        return self.read_range(anomalies_key(person_id), start_time, end_time)
+
+    def read_latest(self, person_id):
+        records = self.read_tail(samples_key(person_id), 1)
+        return records[0] if len(records) else None
+
+    def read_latest_many(self, person_ids):
+        """The newest sample of each person in one round trip, aligned with ``person_ids`` (ts 0 where there is none)."""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for person_id in person_ids:
+            pipe.zrange(samples_key(person_id), -1, -1)
+        latest = np.zeros(len(person_ids), dtype=SAMPLE_DTYPE)
+        for i, members in enumerate(pipe.execute()):
+            if members:
+                latest[i] = decode_samples(members)[0]
+        return latest
+
+    def read_episodes(self, person_id, start_time=None):
+        """Anomaly episodes still running at or after ``start_time``, oldest first."""
+        start = '-inf' if start_time is None else to_epoch_ms(start_time)
+        return decode_episodes(self.redis_client.zrangebyscore(episodes_key(person_id), start, '+inf'))
+
+    def read_rollups(self, person_id, seconds, start_time=None):
+        """Buckets of the ``seconds`` tier starting at or after ``start_time`` as a ROLLUP_DTYPE array."""
+        start = '-inf' if start_time is None else to_epoch_ms(start_time)
+        return decode_rollups(self.redis_client.zrangebyscore(rollup_key(person_id, seconds), start, '+inf'))
+
+    def read_versions(self, person_id):
+        samples, anomalies = self.redis_client.hmget(version_key(person_id), 'samples', 'anomalies')
+        return {'samples': int(samples or 0), 'anomalies': int(anomalies or 0)}
+
+    def read_metadata(self, person_id):
+        metadata = self.redis_client.get(metadata_key(person_id))
+        return json.loads(metadata) if metadata else None
+
+    def read_metadata_many(self, person_ids):
+        values = self.redis_client.mget([metadata_key(person_id) for person_id in person_ids])
+        return {person_id: json.loads(value) for person_id, value in zip(person_ids, values) if value}
+
+    def write_metadata(self, person_id, metadata, ttl=None, overwrite=True):
+        self.redis_client.set(metadata_key(person_id), json.dumps(metadata), ex=ttl, nx=not overwrite)